@@ -1,181 +1,284 @@
 import os
 import json
-from flask import Flask, render_template_string, request, redirect, url_for, flash, jsonify
-from flask_sqlalchemy import SQLAlchemy
-from flask_login import LoginManager, UserMixin, login_user, login_required, logout_user, current_user
+import uuid
+from flask import Flask, Response, render_template, request, redirect, url_for, flash, jsonify
+from flask_login import LoginManager, login_user, login_required, logout_user, current_user
 from werkzeug.security import generate_password_hash, check_password_hash
-import FinanceDataReader as fdr
 from datetime import datetime, timedelta
+from quote_cache import QuoteCache
+import shared_cache
+from leaderboard import Leaderboard
+from market_store import MarketStore, MarketIngestor, ListingNames
+from board_snapshot import BoardSnapshot, SORT_KEYS
+from market_hours import MarketSchedule, holidays_from_env
+from chart_data import ChartCache, DOWNSAMPLERS
+from search_index import SearchIndex
+from live import QuotePublisher, sse_stream
+from metrics import RequestMetrics, span
+from valuation import positions_frame, value_positions, value_rows, user_totals, equity_curve, curve_stats
+from models import db, init_db, normalize_db_url, SQLITE_PRAGMAS, User, Stock
+from trading import execute_order, execute_orders
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'devops-secret-key-v2'
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///stock.db'
+# DATABASE_URL 예) sqlite:////data/stock.db (볼륨에 저장), postgresql://user:pw@db:5432/trader
+# 기존 SQLite 데이터를 Postgres로 옮길 때: python migrate_db.py sqlite:///instance/stock.db postgresql://...
+app.config['SQLALCHEMY_DATABASE_URI'] = normalize_db_url(os.environ.get('DATABASE_URL', 'sqlite:///stock.db'))
+SQLITE_PRAGMAS['journal_mode'] = os.environ.get('SQLITE_JOURNAL_MODE', 'WAL')
+SQLITE_PRAGMAS['synchronous'] = os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL')
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+# 여러 워커가 동시에 기동할 때 스키마 생성을 직렬화할 잠금 파일 (gunicorn.conf.py 에서 기본값 지정)
+app.config['DB_INIT_LOCK'] = os.environ.get('DB_INIT_LOCK')
+# 워커당 커넥션 풀 (gunicorn 워커 수 x (POOL_SIZE + MAX_OVERFLOW) 가 DB 최대 연결 수를 넘지 않게)
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+    'pool_pre_ping': True,
+    'pool_recycle': int(os.environ.get('DB_POOL_RECYCLE', 1800)),
+}
+if app.config['SQLALCHEMY_DATABASE_URI'] not in ('sqlite://', 'sqlite:///:memory:'):
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'].update(
+        pool_size=int(os.environ.get('DB_POOL_SIZE', 5)),
+        max_overflow=int(os.environ.get('DB_MAX_OVERFLOW', 10)),
+        pool_timeout=int(os.environ.get('DB_POOL_TIMEOUT', 30)),
+    )
+app.config['CACHE_URL'] = os.environ.get('CACHE_URL', 'memory://')
+app.config['QUOTE_CACHE_SIZE'] = int(os.environ.get('QUOTE_CACHE_SIZE', 4096))
+app.config['QUOTE_CACHE_TTL'] = float(os.environ.get('QUOTE_CACHE_TTL', 30))
+app.config['QUOTE_CACHE_ERROR_TTL'] = float(os.environ.get('QUOTE_CACHE_ERROR_TTL', 5))
+app.config['QUOTE_FETCH_WORKERS'] = int(os.environ.get('QUOTE_FETCH_WORKERS', 8))
+app.config['QUOTE_FETCH_TIMEOUT'] = float(os.environ.get('QUOTE_FETCH_TIMEOUT', 5))
+app.config['QUOTE_BULK_THRESHOLD'] = int(os.environ.get('QUOTE_BULK_THRESHOLD', 8))
+app.config['LEADERBOARD_REFRESH_SECONDS'] = float(os.environ.get('LEADERBOARD_REFRESH_SECONDS', 60))
+app.config['MARKET_DB_PATH'] = os.environ.get('MARKET_DB_PATH', 'market.db')
+app.config['MARKET_INGEST_ENABLED'] = os.environ.get('MARKET_INGEST_ENABLED', '1') == '1'
+app.config['MARKET_INGEST_INTERVAL'] = float(os.environ.get('MARKET_INGEST_INTERVAL', 60))
+# 장외(개장 전/마감 후/휴장일) 캐시 TTL과 권장 폴링 주기의 상한. 장중 값은 각 *_TTL/*_INTERVAL 설정
+app.config['MARKET_MAX_TTL'] = float(os.environ.get('MARKET_MAX_TTL', 1800))
+app.config['MARKET_INGEST_LOCK'] = os.environ.get('MARKET_INGEST_LOCK')
+app.config['MARKET_REQUEST_TIMEOUT'] = float(os.environ.get('MARKET_REQUEST_TIMEOUT', 3))
+app.config['MARKET_HISTORY_DAYS'] = int(os.environ.get('MARKET_HISTORY_DAYS', 365))
+app.config['CHART_CACHE_MAX_AGE'] = int(os.environ.get('CHART_CACHE_MAX_AGE', 600))
+app.config['BOARD_TOP_N'] = int(os.environ.get('BOARD_TOP_N', 30))
+app.config['BOARD_MAX_N'] = int(os.environ.get('BOARD_MAX_N', 100))
+app.config['BOARD_REFRESH_OPEN'] = float(os.environ.get('BOARD_REFRESH_OPEN', 10))
+app.config['ORDER_BATCH_MAX'] = int(os.environ.get('ORDER_BATCH_MAX', 500))
+app.config['LIVE_PUSH_INTERVAL'] = float(os.environ.get('LIVE_PUSH_INTERVAL', 5))
+app.config['LIVE_HEARTBEAT'] = float(os.environ.get('LIVE_HEARTBEAT', 15))
+app.config['LIVE_MAX_CODES'] = int(os.environ.get('LIVE_MAX_CODES', 100))
+# 워커당 동시 스트림 상한 (기본: 워커 스레드의 절반. 나머지 스레드는 일반 요청용)
+app.config['LIVE_MAX_STREAMS'] = int(os.environ.get(
+    'LIVE_MAX_STREAMS', max(1, int(os.environ.get('GUNICORN_THREADS', 16)) // 2)))
+app.config['LIVE_PUSH_MAX_INTERVAL'] = float(os.environ.get('LIVE_PUSH_MAX_INTERVAL', 60))
+app.config['CLIENT_POLL_INTERVAL'] = float(os.environ.get('CLIENT_POLL_INTERVAL', 30))
+# 워커가 여러 개일 때 /metrics 를 합산하기 위한 스냅샷 폴더 (gunicorn.conf.py 에서 기본값 지정)
+app.config['METRICS_DIR'] = os.environ.get('METRICS_DIR')
 
-db = SQLAlchemy(app)
+db.init_app(app)
 login_manager = LoginManager()
 login_manager.init_app(app)
 login_manager.login_view = 'login'
 login_manager.login_message = "로그인이 필요한 서비스입니다."
+# 요청별 구간 시간(db/render/fdr) -> Server-Timing 헤더, 라우트별 지연 히스토그램 -> /metrics
+request_metrics = RequestMetrics(app, export_dir=app.config['METRICS_DIR'])
 
 # ==========================================
 # 1. 초기 데이터 로드 (종목명 매핑)
 # ==========================================
-print("📈 한국거래소(KRX) 종목 데이터를 불러오는 중...")
-try:
-    krx_df = fdr.StockListing('KRX')
-    STOCK_DICT = dict(zip(krx_df['Code'], krx_df['Name']))
-    print(f"✅ 총 {len(STOCK_DICT)}개 종목 준비 완료!")
-except:
-    STOCK_DICT = {}
+# 기동 시 네트워크로 StockListing('KRX')를 받지 않고, 수집 스레드가 저장해 둔 로컬 스냅샷(market.db)을 바로 읽음.
+# 스냅샷 갱신은 백그라운드 수집기(market_ingestor)가 하고, STOCK_DICT는 갱신 시각이 바뀌면 다시 읽는다.
+market_store = MarketStore(app.config['MARKET_DB_PATH'])
+STOCK_DICT = ListingNames(market_store)
+print(f"📈 로컬 스냅샷에서 {len(STOCK_DICT)}개 종목 로드 (갱신은 백그라운드에서 진행)")
 
 def get_stock_name(code):
     return STOCK_DICT.get(code, "알수없는종목")
 
+# 종목 검색 인덱스 (STOCK_DICT 스냅샷이 바뀌면 다시 만듦)
+_search = {'version': object(), 'index': SearchIndex({})}
+
+def get_search_index():
+    STOCK_DICT.maybe_reload()
+    if _search['version'] != STOCK_DICT.version:
+        _search.update(version=STOCK_DICT.version, index=SearchIndex(STOCK_DICT.items()))
+    return _search['index']
+
+def is_known_code(code):
+    # 목록을 아직 못 받은 콜드 스타트에는 검증을 건너뛰고 시세 조회 결과로 판단
+    index = get_search_index()
+    return len(index) == 0 or code in index
+
 # ==========================================
-# 2. DB 모델
+# 2. DB 모델 (models.py)
 # ==========================================
-class User(UserMixin, db.Model):
-    id = db.Column(db.Integer, primary_key=True)
-    username = db.Column(db.String(100), unique=True, nullable=False)
-    password_hash = db.Column(db.String(200), nullable=False)
-    nickname = db.Column(db.String(100), nullable=False)
-    cash = db.Column(db.Float, default=1000000.0)
-    stocks = db.relationship('Stock', backref='owner', lazy=True)
-
-class Stock(db.Model):
-    id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
-    code = db.Column(db.String(20), nullable=False)
-    name = db.Column(db.String(100), default="Unknown")
-    quantity = db.Column(db.Integer, default=0)
-    avg_price = db.Column(db.Float, default=0.0)
+with app.app_context():
+    init_db(app.config['DB_INIT_LOCK'])
 
 @login_manager.user_loader
 def load_user(user_id):
     return User.query.get(int(user_id))
 
 # ==========================================
-# 3. 데이터 유틸리티 (캐싱 포함)
+# 3. 데이터 유틸리티 (로컬 시세 저장소 + 캐싱)
 # ==========================================
-def get_kospi_top30():
-    try:
-        df = fdr.StockListing('KOSPI')
-        return df.head(30)[['Code', 'Name', 'Marcap', 'Close', 'ChagesRatio']].to_dict(orient='records')
-    except:
-        return []
-
-def get_stock_history(code):
-    try:
-        end_date = datetime.now()
-        start_date = end_date - timedelta(days=90)
-        df = fdr.DataReader(code, start_date, end_date)
-        return {'labels': [d.strftime('%Y-%m-%d') for d in df.index], 'prices': df['Close'].tolist()}
-    except:
-        return {'labels': [], 'prices': []}
-
-def get_current_price_cached(code, cache_dict):
-    if code in cache_dict: return cache_dict[code]
-    try:
-        price = int(fdr.DataReader(code).iloc[-1]['Close'])
-        cache_dict[code] = price
-        return price
-    except:
-        cache_dict[code] = 0
-        return 0
+# 네트워크 조회는 수집 스레드(market_ingestor)만 하고, 요청 처리는 market_store만 읽음
+# 수집 주기와 캐시 TTL은 market_schedule(KRX 거래일/장 시간)이 정함:
+# 장중에는 설정값대로, 마감 후에는 종가 수집 한 번, 휴장일/야간에는 갱신 없음
+market_schedule = MarketSchedule(holidays_from_env(), max_ttl=app.config['MARKET_MAX_TTL'])
+
+def get_held_codes():
+    with app.app_context():
+        return [code for (code,) in db.session.query(Stock.code).distinct()]
+
+# 게시판: KOSPI 전체를 스냅샷으로 한 번 읽고, 정렬 기준/N별 카드 HTML은 스냅샷이 바뀔 때까지 재사용
+# (장외에는 목록이 바뀌지 않으므로 저장소 확인도 드물게)
+board_snapshot = BoardSnapshot(
+    market_store, 'KOSPI',
+    interval=lambda: market_schedule.ttl(app.config['BOARD_REFRESH_OPEN']),
+    render=lambda stocks: render_template('board_cards.html', stocks=stocks))
+
+def on_listing():
+    # 이 워커의 수집기가 목록을 새로 저장했으면 확인 주기를 기다리지 않고 바로 다시 읽음
+    STOCK_DICT.reload()
+    board_snapshot.reload()
+
+market_ingestor = MarketIngestor(market_store, tracked_codes=get_held_codes,
+                                 interval=lambda: market_schedule.refresh_in(app.config['MARKET_INGEST_INTERVAL']),
+                                 history_days=app.config['MARKET_HISTORY_DAYS'],
+                                 lock_path=app.config['MARKET_INGEST_LOCK'],
+                                 on_listing=on_listing,
+                                 span=span)
+
+_workers_started = False
+
+@app.before_request
+def start_background_workers():
+    global _workers_started
+    if not _workers_started and app.config['MARKET_INGEST_ENABLED']:
+        _workers_started = True
+        market_ingestor.start()
+
+def board_args():
+    n = min(max(request.args.get('n', app.config['BOARD_TOP_N'], type=int), 1), app.config['BOARD_MAX_N'])
+    sort = request.args.get('sort', 'marcap')
+    return n, sort if sort in SORT_KEYS else 'marcap'
+
+def get_stock_history(code, days=90):
+    start_date = datetime.now() - timedelta(days=days)
+    rows = market_store.history(code, start_date)
+    if not rows:
+        # 처음 보는 종목은 수집 스레드에 요청하고 잠깐만 기다림
+        with span('fdr_wait'):
+            market_ingestor.request(code, timeout=app.config['MARKET_REQUEST_TIMEOUT'])
+        rows = market_store.history(code, start_date)
+    return rows
+
+# 종목/기간별 차트 응답 캐시 (장중에는 수집 주기마다, 장외에는 다음 개장까지 재사용)
+chart_cache = ChartCache(get_stock_history,
+                         epoch=lambda: market_schedule.epoch(app.config['MARKET_INGEST_INTERVAL']))
+
+def fetch_current_price(code):
+    price = market_store.latest_close(code)
+    if price is None:
+        with span('fdr_wait'):
+            market_ingestor.request(code, timeout=app.config['MARKET_REQUEST_TIMEOUT'])
+        price = market_store.latest_close(code)
+    if price is None:
+        raise KeyError(code)
+    return price
+
+def fetch_listing_prices():
+    # 미스가 많을 때는 종목별 조회 대신 저장소의 전 종목 종가 스냅샷을 한 번에 읽음
+    return market_store.listing_closes()
+
+# 요청마다 새 dict를 만들던 방식 대신, 모든 요청/사용자가 공유하는 시세 캐시
+# (CACHE_URL이 file:// 또는 redis:// 이면 gunicorn 워커끼리도 공유)
+quote_cache = QuoteCache(
+    fetch_current_price,
+    maxsize=app.config['QUOTE_CACHE_SIZE'],
+    ttl=lambda: market_schedule.ttl(app.config['QUOTE_CACHE_TTL']),
+    error_ttl=app.config['QUOTE_CACHE_ERROR_TTL'],
+    bulk_fetch=fetch_listing_prices,
+    bulk_threshold=app.config['QUOTE_BULK_THRESHOLD'],
+    max_workers=app.config['QUOTE_FETCH_WORKERS'],
+    timeout=app.config['QUOTE_FETCH_TIMEOUT'],
+    shared=shared_cache.from_url(app.config['CACHE_URL']) if app.config['CACHE_URL'] != 'memory://' else None,
+)
+
+# 시세 캐시 통계 -> /metrics (적중률은 Prometheus에서 hits / (hits + misses) 로 계산)
+QUOTE_CACHE_METRICS = (
+    ('hits', 'quote_cache_hits_total', 'counter', '시세 캐시 적중'),
+    ('misses', 'quote_cache_misses_total', 'counter', '시세 캐시 미스'),
+    ('coalesced', 'quote_cache_coalesced_total', 'counter', '다른 요청의 조회를 기다려 재사용한 미스'),
+    ('shared_hits', 'quote_cache_shared_hits_total', 'counter', '공유 캐시(CACHE_URL)에서 찾은 미스'),
+    ('errors', 'quote_cache_errors_total', 'counter', '시세 조회 실패'),
+    ('stale', 'quote_cache_stale_total', 'counter', '조회 실패로 마지막 시세를 대신 돌려준 횟수'),
+    ('evictions', 'quote_cache_evictions_total', 'counter', 'LRU로 밀려난 항목'),
+    ('fetches', 'quote_cache_fetches_total', 'counter', '종목별 시세 조회 횟수'),
+    ('fetch_seconds', 'quote_cache_fetch_seconds_total', 'counter', '종목별 시세 조회에 쓴 시간 합계'),
+    ('size', 'quote_cache_entries', 'gauge', '시세 캐시 항목 수'),
+)
+for stat, name, kind, help_text in QUOTE_CACHE_METRICS:
+    request_metrics.registry.value(name, help_text, kind, lambda stat=stat: quote_cache.stats()[stat])
+
+def get_current_price_cached(code, default=0):
+    with span('quotes'):
+        return quote_cache.get(code, default)
+
+def get_prices(codes, default=0):
+    with span('quotes'):
+        return quote_cache.get_many(codes, default)
+
+def get_known_prices(codes):
+    # 랭킹/실시간 푸시용: 시세를 한 번도 못 받은 종목은 0 대신 None (반영하지 않음)
+    return get_prices(codes, default=None)
+
+def load_positions(user_id=None):
+    # 보유 내역을 ORM 객체 대신 컬럼 튜플로 읽어 DataFrame으로 (평가는 valuation.py에서 한 번에)
+    q = db.session.query(Stock.user_id, Stock.code, Stock.name, Stock.quantity, Stock.avg_price)
+    if user_id is not None:
+        q = q.filter(Stock.user_id == user_id)
+    return positions_frame(q)
+
+def load_leaderboard_positions(user_id=None):
+    # 사용자 전체 로드 + N번의 lazy load 대신, 쿼리 2번으로 현금과 종목별 합산 수량/매입금액만 읽음
+    # (매입금액은 시세를 아직 못 받은 종목의 평가액 - 대시보드 총자산과 같은 규칙)
+    with app.app_context():
+        user_q = db.session.query(User.id, User.nickname, User.cash)
+        stock_q = db.session.query(Stock.user_id, Stock.code, db.func.sum(Stock.quantity),
+                                   db.func.sum(Stock.quantity * Stock.avg_price)) \
+            .group_by(Stock.user_id, Stock.code)
+        if user_id is not None:
+            user_q = user_q.filter(User.id == user_id)
+            stock_q = stock_q.filter(Stock.user_id == user_id)
+        users = {uid: (nickname, cash) for uid, nickname, cash in user_q}
+        holdings = {}
+        for uid, code, qty, cost in stock_q:
+            holdings.setdefault(uid, {})[code] = (qty, cost)
+    return users, holdings
+
+leaderboard = Leaderboard(load_leaderboard_positions, get_known_prices,
+                          max_age=app.config['LEADERBOARD_REFRESH_SECONDS'])
+
+# 열린 화면(SSE 연결)이 몇 개든 워커당 발행 스레드 하나가 시세를 읽고 바뀐 값만 나눠 보냄
+publisher = QuotePublisher(get_known_prices, leaderboard,
+                           interval=lambda: market_schedule.ttl(app.config['LIVE_PUSH_INTERVAL'],
+                                                                app.config['LIVE_PUSH_MAX_INTERVAL']),
+                           max_subscribers=app.config['LIVE_MAX_STREAMS'])
 
 # ==========================================
-# 4. 베이스 HTML (반응형 메뉴바 & 폰트 추가)
+# 4. 템플릿 (templates/ 폴더, 한 번 컴파일 후 재사용)
 # ==========================================
-base_html = """
-<!DOCTYPE html>
-<html>
-<head>
-    <meta charset="utf-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1">
-    <title>DevOps Pro Trade</title>
-    <link href="https://fonts.googleapis.com/css2?family=Noto+Sans+KR:wght@400;700&display=swap" rel="stylesheet">
-    <link href="https://cdn.jsdelivr.net/npm/bootstrap@5.1.3/dist/css/bootstrap.min.css" rel="stylesheet">
-    <script src="https://cdn.jsdelivr.net/npm/chart.js"></script>
-    <style>
-        body { padding-top: 80px; background-color: #1e1e2f; color: #e0e0e0; font-family: 'Noto Sans KR', sans-serif;}
-        .card { background-color: #27293d; border: none; margin-bottom: 20px; box-shadow: 0 4px 6px rgba(0,0,0,0.3); }
-        .table { color: #e0e0e0; vertical-align: middle; }
-        .form-control, .form-select { background-color: #1e1e2f; border: 1px solid #2b3553; color: white; }
-        .form-control:focus { background-color: #1e1e2f; color: white; border-color: #00d6b4; box-shadow: none; }
-        .nav-link { color: #aaa !important; font-weight: bold; }
-        .nav-link:hover { color: #fff !important; }
-        .rank-item { background-color: transparent; border-bottom: 1px solid #3e3e5e; color: #e0e0e0; }
-        
-        /* 타이머 CSS */
-        .circular-chart { display: block; width: 30px; height: 30px; }
-        .circle-bg { fill: none; stroke: #3e3e5e; stroke-width: 3; }
-        .circle { fill: none; stroke-width: 3; stroke-linecap: round; transition: stroke-dasharray 1s linear; }
-        .timer-text { fill: white; font-size: 11px; font-weight: bold; text-anchor: middle; }
-    </style>
-</head>
-<body>
-    <nav class="navbar navbar-expand-lg navbar-dark bg-dark fixed-top px-3 border-bottom border-secondary">
-        <div class="container-fluid">
-            <a class="navbar-brand text-warning fw-bold" href="/">⚡ DevOps Trader</a>
-            <button class="navbar-toggler" type="button" data-bs-toggle="collapse" data-bs-target="#navbarNav">
-                <span class="navbar-toggler-icon"></span>
-            </button>
-            <div class="collapse navbar-collapse" id="navbarNav">
-                <ul class="navbar-nav me-auto mb-2 mb-lg-0">
-                    <li class="nav-item"><a class="nav-link" href="/">내 자산</a></li>
-                    <li class="nav-item"><a class="nav-link" href="/board">📊 차트 게시판</a></li>
-                </ul>
-                <div class="d-flex align-items-center">
-                    <div class="d-flex align-items-center me-3">
-                        <span class="me-2 text-muted" style="font-size: 0.8rem;">데이터 갱신</span>
-                        <svg viewBox="0 0 36 36" class="circular-chart">
-                          <path class="circle-bg" d="M18 2.0845 a 15.9155 15.9155 0 0 1 0 31.831 a 15.9155 15.9155 0 0 1 0 -31.831" />
-                          <path class="circle" id="timerCircle" stroke="#00d6b4" stroke-dasharray="100, 100" d="M18 2.0845 a 15.9155 15.9155 0 0 1 0 31.831 a 15.9155 15.9155 0 0 1 0 -31.831" />
-                          <text x="18" y="22" class="timer-text" id="timerText">30</text>
-                        </svg>
-                    </div>
-                    {% if current_user.is_authenticated %}
-                        <span class="me-3 text-light">{{ current_user.nickname }}님</span>
-                        <a href="/logout" class="btn btn-sm btn-outline-danger">로그아웃</a>
-                    {% else %}
-                        <a href="/login" class="btn btn-sm btn-primary">로그인</a>
-                    {% endif %}
-                </div>
-            </div>
-        </div>
-    </nav>
-
-    <div class="container-fluid mt-2">
-        {% with messages = get_flashed_messages() %}
-            {% if messages %}<div class="alert alert-info alert-dismissible"><button type="button" class="btn-close" data-bs-dismiss="alert"></button>{{ messages[0] }}</div>{% endif %}
-        {% endwith %}
-        
-        </div>
-
-    <script src="https://cdn.jsdelivr.net/npm/bootstrap@5.1.3/dist/js/bootstrap.bundle.min.js"></script>
-    <script>
-        let maxTime = 30; let time = maxTime;
-        setInterval(() => {
-            if (document.activeElement.tagName === 'INPUT' || document.querySelector('.modal.show')) {
-                time = 10; 
-            } else {
-                time--;
-                if (time <= 0) window.location.reload();
-                else {
-                    document.getElementById('timerText').textContent = time;
-                    document.getElementById('timerCircle').setAttribute('stroke-dasharray', `${(time/maxTime)*100}, 100`);
-                }
-            }
-        }, 1000);
-    </script>
-</body>
-</html>
-"""
-
-def render_layout(content):
-    # 빈칸('')을 바꾸는 게 아니라, 플레이스홀더를 바꾸도록 수정했습니다.
-    return render_template_string(base_html.replace('', content))
+@app.template_filter('comma')
+def comma_filter(value):
+    return f"{int(value):,}"
+
+@app.context_processor
+def order_form_helpers():
+    # 주문 폼마다 새 멱등성 키를 심어서 재전송/더블클릭이 두 번 체결되지 않게 함
+    return {'order_key': lambda: uuid.uuid4().hex}
+
+@app.context_processor
+def market_status_helpers():
+    return {'market_status': lambda: market_schedule.status(app.config['CLIENT_POLL_INTERVAL'])}
 
 # ==========================================
 # 5. 라우트 및 로직
@@ -184,216 +287,184 @@ def render_layout(content):
 @app.route('/')
 @login_required
 def home():
-    price_cache = {}
-    total_asset = current_user.cash
-    my_stocks_html = ""
-    
-    for s in current_user.stocks:
-        now_price = get_current_price_cached(s.code, price_cache)
-        val = now_price * s.quantity
-        total_asset += val
-        profit = val - (s.avg_price * s.quantity)
-        rate = (profit / (s.avg_price * s.quantity) * 100) if s.quantity > 0 else 0
-        color = "text-danger" if profit > 0 else "text-primary"
-        
-        my_stocks_html += f"""
-        <tr>
-            <td class="text-start">
-                <span class="fs-6 fw-bold text-white">{s.name}</span><br>
-                <span class="text-muted" style="font-size: 0.8em;">{s.code}</span>
-            </td>
-            <td>{s.quantity}주</td>
-            <td>{int(s.avg_price):,}원<br><span class="text-muted" style="font-size:0.85em;">현재: {now_price:,}원</span></td>
-            <td>{val:,}원</td>
-            <td class="{color} fw-bold">{int(profit):,}원<br><small>({rate:.2f}%)</small></td>
-        </tr>
-        """
-
-    # 랭킹 계산
-    users = User.query.all()
-    ranking_data = []
-    for u in users:
-        u_total = u.cash
-        for s in u.stocks:
-            u_total += (get_current_price_cached(s.code, price_cache) * s.quantity)
-        ranking_data.append({'nickname': u.nickname, 'asset': u_total})
-        
-    ranking_data.sort(key=lambda x: x['asset'], reverse=True)
-    
-    ranking_html = ""
-    for idx, rank in enumerate(ranking_data[:10]):
-        medal = "🥇" if idx == 0 else "🥈" if idx == 1 else "🥉" if idx == 2 else f"<span class='badge bg-secondary'>{idx+1}</span>"
-        highlight = "bg-primary bg-opacity-25" if rank['nickname'] == current_user.nickname else ""
-        ranking_html += f"""
-        <li class="list-group-item d-flex justify-content-between align-items-center rank-item {highlight} p-3">
-            <span class="fs-6">{medal} <span class="ms-2 fw-bold">{rank['nickname']}</span></span>
-            <span class="text-success fw-bold">{int(rank['asset']):,}원</span>
-        </li>
-        """
-
-    content = f"""
-    <div class="row px-2">
-        <div class="col-lg-3 col-md-12 mb-4">
-            <div class="card p-4">
-                <h6 class="text-muted mb-3">💰 총 보유 자산</h6>
-                <h2 class="text-success fw-bold">{int(total_asset):,} 원</h2>
-                <hr class="border-secondary">
-                <div class="d-flex justify-content-between text-light">
-                    <span>주문 가능 현금</span>
-                    <span>{int(current_user.cash):,} 원</span>
-                </div>
-            </div>
-            
-            <div class="card p-4 mt-3 border border-warning">
-                <h5 class="text-warning mb-3">⚡ 빠른 주문</h5>
-                <form action="/trade" method="post">
-                    <div class="mb-2"><input type="text" name="code" class="form-control" placeholder="종목코드 (예: 005930)" required></div>
-                    <div class="mb-3"><input type="number" name="quantity" class="form-control" placeholder="주문 수량" min="1" required></div>
-                    <div class="row g-2">
-                        <div class="col"><button name="action" value="buy" class="btn btn-danger w-100 fw-bold">매수</button></div>
-                        <div class="col"><button name="action" value="sell" class="btn btn-primary w-100 fw-bold">매도</button></div>
-                    </div>
-                </form>
-            </div>
-        </div>
-
-        <div class="col-lg-6 col-md-12 mb-4">
-            <h4 class="mb-3">📜 내 포트폴리오</h4>
-            <div class="card p-0 overflow-hidden">
-                <div class="table-responsive">
-                    <table class="table table-hover mb-0 text-center" style="font-size: 0.95rem;">
-                        <thead class="table-dark text-muted">
-                            <tr><th class="text-start">종목</th><th>수량</th><th>평단가</th><th>평가금액</th><th>손익/수익률</th></tr>
-                        </thead>
-                        <tbody>{my_stocks_html or "<tr><td colspan='5' class='py-5 text-muted'>보유한 주식이 없습니다.<br>게시판에서 차트를 보고 매수해보세요!</td></tr>"}</tbody>
-                    </table>
-                </div>
-            </div>
-        </div>
-        
-        <div class="col-lg-3 col-md-12 mb-4">
-            <h4 class="mb-3 text-info">🏆 실시간 자산 랭킹</h4>
-            <div class="card p-0 overflow-hidden border border-info">
-                <div class="card-header bg-info text-dark fw-bold text-center p-3 fs-5">Top 10 트레이더</div>
-                <ul class="list-group list-group-flush">{ranking_html}</ul>
-            </div>
-        </div>
-    </div>
-    """
-    return render_layout(content)
+    rows = db.session.query(Stock.code, Stock.name, Stock.quantity, Stock.avg_price) \
+        .filter(Stock.user_id == current_user.id).all()
+    prices = get_known_prices([code for code, _, _, _ in rows])
+    leaderboard.ensure_fresh()
+    # 방금 받은 시세로 해당 종목 보유자의 랭킹 자산만 갱신
+    leaderboard.apply_prices(prices)
+
+    # 한 사용자의 몇 종목이라 DataFrame 대신 루프로 평가 (전체/분석용은 value_positions)
+    with span('valuation'):
+        holdings, stock_value = value_rows(rows, prices)
+        total_asset = current_user.cash + stock_value
+
+    # 랭킹은 리더보드에서 바로 조회 (전체 사용자 재계산 없음)
+    return render_template('home.html', holdings=holdings, total_asset=total_asset, cash=current_user.cash,
+                           ranking=leaderboard.top(10), my_rank=leaderboard.rank(current_user.id),
+                           total_ranked=len(leaderboard))
+
+@app.route('/api/portfolio')
+@login_required
+def portfolio_api():
+    # 종목별 평가 + 합계 + 로컬 일봉 기준 분석(평가액 곡선, 변동성, 최대 낙폭)
+    days = min(max(request.args.get('days', 90, type=int), 2), app.config['MARKET_HISTORY_DAYS'])
+    positions = load_positions(current_user.id)
+    valued = value_positions(positions, get_known_prices(positions['code'].tolist()))
+    totals = user_totals(valued, {current_user.id: current_user.cash}).loc[current_user.id]
+    holdings = dict(zip(valued['code'], valued['quantity']))
+    curve = equity_curve(holdings, current_user.cash, get_stock_history, days)
+    return jsonify({
+        'positions': valued.drop(columns='user_id').round(2).to_dict('records'),
+        'totals': totals.round(2).to_dict(),
+        'equity': {'labels': curve.index.strftime('%Y-%m-%d').tolist(), 'values': curve.round(2).tolist()},
+        'stats': {k: round(v, 4) for k, v in curve_stats(curve).items()},
+    })
 
 @app.route('/board')
 @login_required
 def board():
-    top_stocks = get_kospi_top30()
-    cards_html = ""
-    for s in top_stocks:
-        color = "text-danger" if s['ChagesRatio'] > 0 else "text-primary"
-        # 따옴표 오류 방지용 치환
-        safe_name = s['Name'].replace("'", "").replace('"', "")
-        cards_html += f"""
-        <div class="col-xl-3 col-lg-4 col-md-6 mb-4">
-            <div class="card h-100 p-3" style="cursor: pointer; transition: transform 0.2s;" onmouseover="this.style.transform='scale(1.05)'" onmouseout="this.style.transform='scale(1)'" onclick="openChartModal('{s['Code']}', '{safe_name}')">
-                <div class="d-flex justify-content-between align-items-center mb-2">
-                    <h5 class="text-white mb-0 text-truncate" style="max-width: 70%;">{s['Name']}</h5>
-                    <span class="badge bg-secondary">{s['Code']}</span>
-                </div>
-                <h3 class="fw-bold {color}">{int(s['Close']):,}원</h3>
-                <p class="mb-0 {color} fw-bold">{(s['ChagesRatio']):.2f}%</p>
-            </div>
-        </div>
-        """
-
-    content = f"""
-    <div class="px-3">
-        <h3 class="mb-4">📊 KOSPI 차트 게시판</h3>
-        <div class="row">{cards_html}</div>
-    </div>
-
-    <div class="modal fade" id="chartModal" tabindex="-1">
-      <div class="modal-dialog modal-lg modal-dialog-centered">
-        <div class="modal-content bg-dark text-light border border-secondary">
-          <div class="modal-header border-bottom border-secondary">
-            <h4 class="modal-title fw-bold" id="modalTitle">종목명</h4>
-            <button type="button" class="btn-close btn-close-white" data-bs-dismiss="modal"></button>
-          </div>
-          <div class="modal-body p-4">
-            <div class="mb-4 bg-secondary bg-opacity-10 p-2 rounded"><canvas id="modalChart" height="100"></canvas></div>
-            <form action="/trade" method="post" class="row g-2 align-items-end">
-                <input type="hidden" name="code" id="modalCode">
-                <div class="col-md-6">
-                    <label class="form-label text-muted">주문 수량</label>
-                    <input type="number" name="quantity" class="form-control form-control-lg" min="1" required>
-                </div>
-                <div class="col-md-3"><button name="action" value="buy" class="btn btn-danger btn-lg w-100 fw-bold">매수</button></div>
-                <div class="col-md-3"><button name="action" value="sell" class="btn btn-primary btn-lg w-100 fw-bold">매도</button></div>
-            </form>
-          </div>
-        </div>
-      </div>
-    </div>
-
-    <script>
-        let myChart = null;
-        async function openChartModal(code, name) {{
-            document.getElementById('modalTitle').innerText = name + " (" + code + ")";
-            document.getElementById('modalCode').value = code;
-            new bootstrap.Modal(document.getElementById('chartModal')).show();
-            
-            const data = await (await fetch('/api/chart/' + code)).json();
-            const ctx = document.getElementById('modalChart').getContext('2d');
-            if (myChart) myChart.destroy(); 
-            myChart = new Chart(ctx, {{
-                type: 'line',
-                data: {{ labels: data.labels, datasets: [{{ label: name, data: data.prices, borderColor: '#00d6b4', backgroundColor: 'rgba(0,214,180,0.1)', borderWidth: 2, fill: true, tension: 0.3 }}] }},
-                options: {{ responsive: true, plugins: {{ legend: {{ labels: {{ color: 'white' }} }} }}, scales: {{ x: {{ grid: {{ color: '#2b3553' }}, ticks: {{ color: '#aaa' }} }}, y: {{ grid: {{ color: '#2b3553' }}, ticks: {{ color: '#aaa' }} }} }} }}
-            }});
-        }}
-    </script>
-    """
-    return render_layout(content)
+    n, sort = board_args()
+    return render_template('board.html', cards=board_snapshot.cards(n, sort), n=n, sort=sort)
+
+@app.route('/api/board')
+def board_api():
+    n, sort = board_args()
+    snap = board_snapshot.snapshot()
+    return jsonify({'version': snap.version, 'sort': sort, 'stocks': board_snapshot.top(n, sort, snap)})
 
 @app.route('/api/chart/<code>')
-def chart_api(code): return jsonify(get_stock_history(code))
+def chart_api(code):
+    days = min(max(request.args.get('days', 90, type=int), 1), app.config['MARKET_HISTORY_DAYS'])
+    points = request.args.get('points', type=int)
+    method = request.args.get('method', 'lttb')
+    fmt = request.args.get('format', 'json')
+    if method not in DOWNSAMPLERS or fmt not in ('json', 'compact', 'f32') or (points is not None and points < 3):
+        return jsonify({'error': 'invalid parameter'}), 400
+    if not is_known_code(code):
+        # 인증 없이 열린 API라서, 목록에 없는 코드는 수집 요청(외부 조회 + 최대 3초 대기) 전에 거절
+        return jsonify({'error': 'unknown code'}), 404
+
+    with span('chart'):
+        body, etag = chart_cache.get(code, days, points, method, fmt)
+    resp = Response(body, mimetype='application/octet-stream') if fmt == 'f32' else jsonify(body)
+    # 같은 종목을 다시 열면 nginx/브라우저 캐시 또는 304로 끝나도록
+    resp.set_etag(etag)
+    resp.cache_control.public = True
+    resp.cache_control.max_age = int(market_schedule.ttl(app.config['CHART_CACHE_MAX_AGE']))
+    return resp.make_conditional(request)
+
+@app.route('/api/market')
+def market_api():
+    # 장 상태와 권장 폴링 주기 (장외에는 다음 개장까지 길게)
+    status = market_schedule.status(app.config['CLIENT_POLL_INTERVAL'])
+    resp = jsonify(status)
+    resp.cache_control.max_age = min(status['poll_interval'], 60)
+    resp.headers['X-Poll-Interval'] = str(status['poll_interval'])
+    return resp
+
+@app.route('/api/search')
+def search_api():
+    limit = min(max(request.args.get('limit', 10, type=int), 1), 50)
+    resp = jsonify(get_search_index().search(request.args.get('q', ''), limit))
+    resp.cache_control.public = True
+    resp.cache_control.max_age = 300
+    return resp
+
+@app.route('/api/stream')
+@login_required
+def stream_api():
+    # 화면에 보이는 종목(codes) + 내 보유 종목의 시세/총자산/랭킹 변경분을 Server-Sent Events로 전송
+    codes = {c for c in request.args.get('codes', '').split(',') if c}
+    codes.update(s.code for s in current_user.stocks)
+    codes = sorted(codes)[:app.config['LIVE_MAX_CODES']]
+    leaderboard.ensure_fresh()
+    sub = publisher.subscribe(codes, user_id=current_user.id)
+    if sub is None:
+        # 스트림 자리가 없으면 503 -> 브라우저는 주기적 새로고침으로 대체
+        resp = jsonify({'error': 'too many streams'})
+        resp.headers['Retry-After'] = '30'
+        return resp, 503
+    resp = Response(sse_stream(publisher, sub, heartbeat=app.config['LIVE_HEARTBEAT']),
+                    mimetype='text/event-stream')
+    # 본문을 한 번도 읽기 전에 연결이 끊겨도 구독 자리를 돌려받도록
+    resp.call_on_close(lambda: publisher.unsubscribe(sub))
+    resp.headers['Cache-Control'] = 'no-cache'
+    # nginx가 응답을 모아서 보내지 않도록 (location 설정이 없어도 적용)
+    resp.headers['X-Accel-Buffering'] = 'no'
+    return resp
 
 @app.route('/trade', methods=['POST'])
 @login_required
 def trade():
     code = request.form.get('code')
-    qty = int(request.form.get('quantity'))
+    qty = parse_quantity(request.form.get('quantity'))
     action = request.form.get('action')
-    try:
-        price = int(fdr.DataReader(code).iloc[-1]['Close'])
-        name = get_stock_name(code)
-    except:
+    if not code or not qty or qty <= 0 or action not in ('buy', 'sell'):
+        flash("❌ 잘못된 주문입니다.")
+        return redirect(request.referrer or url_for('home'))
+    code = code.strip()
+    if not is_known_code(code):
+        # 없는 코드는 시세 조회(네트워크)까지 가지 않고 바로 거절
+        flash(f"'{code}' 종목을 찾을 수 없습니다.")
+        return redirect(request.referrer or url_for('home'))
+    price = get_current_price_cached(code, default=None)
+    name = get_stock_name(code)
+    if price is None:
         flash(f"'{code}' 종목을 찾을 수 없습니다.")
         return redirect(request.referrer or url_for('home'))
 
-    cost = price * qty
-    stock = Stock.query.filter_by(user_id=current_user.id, code=code).first()
-
-    if action == 'buy':
-        if current_user.cash >= cost:
-            current_user.cash -= cost
-            if stock:
-                stock.avg_price = ((stock.quantity * stock.avg_price) + cost) / (stock.quantity + qty)
-                stock.quantity += qty
-                stock.name = name 
-            else:
-                db.session.add(Stock(user_id=current_user.id, code=code, name=name, quantity=qty, avg_price=price))
-            flash(f"✅ {name} {qty}주 매수 완료!")
-        else: flash("❌ 잔액이 부족합니다.")
-    elif action == 'sell':
-        if stock and stock.quantity >= qty:
-            current_user.cash += cost
-            stock.quantity -= qty
-            if stock.quantity == 0: db.session.delete(stock)
-            flash(f"✅ {name} {qty}주 매도 완료!")
-        else: flash("❌ 보유 수량이 부족합니다.")
-        
-    db.session.commit()
+    result = execute_order(current_user.id, action, code, qty, price, name,
+                           idempotency_key=request.form.get('idempotency_key'))
+    flash(result.message)
+    leaderboard.reload_user(current_user.id)
     return redirect(request.referrer or url_for('home'))
 
+def parse_quantity(value):
+    # 정수(또는 정수 문자열)만 받음. 2.9 -> 2 처럼 조용히 깎지 않고 잘못된 주문으로 처리
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, int):
+        return value
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, str) and value.strip().isdigit():
+        return int(value.strip())
+    return None
+
+def parse_order_id(value):
+    # client_order_id: 문자열 또는 정수. 그 밖의 값(객체/배열 등)은 그대로 넘겨 주문 단위로 거절됨
+    if isinstance(value, int) and not isinstance(value, bool):
+        return str(value)
+    return value
+
+@app.route('/api/orders', methods=['POST'])
+@login_required
+def orders_api():
+    # 봇/일괄 리밸런싱용: 주문 여러 건을 종목당 시세 1번, 커밋 1번으로 처리
+    payload = request.get_json(silent=True)
+    orders = payload.get('orders') if isinstance(payload, dict) else None
+    if not isinstance(orders, list) or not orders or len(orders) > app.config['ORDER_BATCH_MAX']:
+        return jsonify({'error': f"orders must be a list of 1..{app.config['ORDER_BATCH_MAX']} items"}), 400
+
+    codes = {str(o.get('code')) for o in orders if isinstance(o, dict)}
+    prices = get_prices([c for c in codes if is_known_code(c)], default=None)
+    batch = []
+    for o in orders:
+        o = o if isinstance(o, dict) else {}
+        code = str(o.get('code'))
+        batch.append({'action': o.get('action'), 'code': code, 'quantity': parse_quantity(o.get('quantity')),
+                      'price': prices.get(code), 'name': get_stock_name(code),
+                      'idempotency_key': parse_order_id(o.get('client_order_id'))})
+
+    results = execute_orders(current_user.id, batch)
+    leaderboard.reload_user(current_user.id)
+    return jsonify({
+        'results': [{'code': b['code'], 'action': b['action'], 'quantity': b['quantity'], 'price': b['price'],
+                     'ok': r.ok, 'message': r.message} for b, r in zip(batch, results)],
+        'filled': sum(r.ok for r in results),
+    })
+
 @app.route('/login', methods=['GET', 'POST'])
 def login():
     if request.method == 'POST':
@@ -405,28 +476,7 @@ def login():
             return redirect(next_page or '/')
         flash("로그인 정보가 틀렸습니다.")
         
-    content = """
-    <div class="row justify-content-center" style="margin-top: 10vh;">
-        <div class="col-md-5 col-lg-4">
-            <div class="card p-4 border border-info shadow-lg">
-                <h3 class="text-center mb-4 text-info fw-bold">로그인</h3>
-                <form method="post">
-                    <div class="mb-3">
-                        <input type="text" name="username" class="form-control" placeholder="아이디" required>
-                    </div>
-                    <div class="mb-3">
-                        <input type="password" name="password" class="form-control" placeholder="비밀번호" required>
-                    </div>
-                    <button class="btn btn-info w-100 fw-bold text-dark mb-2">접속하기</button>
-                </form>
-                <div class="text-center mt-3">
-                    <a href="/register" class="text-muted text-decoration-none">계정이 없으신가요? <b>회원가입</b></a>
-                </div>
-            </div>
-        </div>
-    </div>
-    """
-    return render_layout(content)
+    return render_template('login.html')
 
 @app.route('/register', methods=['GET', 'POST'])
 def register():
@@ -436,31 +486,14 @@ def register():
             user = User(username=request.form.get('username'), password_hash=pw, nickname=request.form.get('nickname'))
             db.session.add(user)
             db.session.commit()
+            leaderboard.reload_user(user.id)
             flash("회원가입이 완료되었습니다. 로그인해주세요!")
             return redirect('/login')
         except: 
             flash("이미 존재하는 아이디입니다.")
             
-    content = """
-    <div class="row justify-content-center" style="margin-top: 10vh;">
-        <div class="col-md-5 col-lg-4">
-            <div class="card p-4 border border-success shadow-lg">
-                <h3 class="text-center mb-3 text-success fw-bold">회원가입</h3>
-                <p class="text-center text-muted mb-4">가입 시 축하금 <b>1,000,000원</b>이 지급됩니다.</p>
-                <form method="post">
-                    <div class="mb-2">
-                        <input name="username" class="form-control" placeholder="사용할 아이디" required>
-                    </div>
-                    <div class="mb-2">
-                        <input name="password" type="password" class="form-control" placeholder="비밀번호" required>
-                    </div>
-                    <div class="mb-4">
-                        <input name="nickname" class="form-control" placeholder="닉네임 (게시판 노출용)" required>
-                    </div>
-                    <button class="btn btn-success w-100 fw-bold">가입 완료하기</button>
-                </form>
-            </div>
-        </div>
-    </div>
-    """
-    return render_layout(content)
\ No newline at end of file
+    return render_template('register.html')
+
+if __name__ == '__main__':
+    # 개발용 서버. 운영은 gunicorn -c gunicorn.conf.py wsgi:app
+    app.run(host='0.0.0.0', port=int(os.environ.get('PORT', 5000)))
@@ -0,0 +1,142 @@
+"""대시보드 DB 조회 패턴 벤치마크 (기본 1만 명 x 5종목).
+
+before: Stock 테이블에 (user_id, code) / code 인덱스가 없을 때 (풀 스캔)
+after : models.py 인덱스 적용
+
+조회 패턴 (요청 1번에 나가는 쿼리 기준)
+  load_user     사용자 1명 (로그인 세션)
+  positions     내 보유 종목 (home, u.stocks)
+  trade_lookup  filter_by(user_id, code) (주문)
+  rank_reload   주문 직후 리더보드 1명 재집계
+  held_codes    보유 종목 코드 목록 (수집 대상)
+  full_refresh  리더보드 전체 재집계
+
+    python bench/bench_db.py [사용자수] [사용자당종목수] [반복횟수]
+    BENCH_DATABASE_URL=postgresql://... python bench/bench_db.py   # Postgres로 실행 (빈 DB만, 끝나면 테이블 삭제)
+"""
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask  # noqa: E402
+
+from models import db, init_db, User, Stock  # noqa: E402
+from seed import require_empty_db  # noqa: E402
+
+STOCK_INDEXES = ('uq_stock_user_code', 'ix_stock_code')
+
+
+def make_app(uri):
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = uri
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    db.init_app(app)
+    return app
+
+
+def seed(n_users, per_user, n_codes=2000, seed=0):
+    rnd = random.Random(seed)
+    codes = [f'{i:06d}' for i in range(n_codes)]
+    require_empty_db()
+    db.drop_all()
+    init_db()
+    db.session.execute(User.__table__.insert(), [
+        {'id': i, 'username': f'u{i}', 'password_hash': 'x', 'nickname': f'u{i}', 'cash': 1_000_000.0}
+        for i in range(1, n_users + 1)])
+    db.session.execute(Stock.__table__.insert(), [
+        {'user_id': uid, 'code': code, 'name': code, 'quantity': rnd.randint(1, 100), 'avg_price': 50000.0}
+        for uid in range(1, n_users + 1) for code in rnd.sample(codes, per_user)])
+    db.session.commit()
+
+
+def patterns(n_users):
+    rnd = random.Random(1)
+
+    def load_user():
+        db.session.get(User, rnd.randint(1, n_users))
+        db.session.expunge_all()
+
+    def positions():
+        uid = rnd.randint(1, n_users)
+        db.session.query(Stock.user_id, Stock.code, Stock.name, Stock.quantity, Stock.avg_price) \
+            .filter(Stock.user_id == uid).all()
+
+    def trade_lookup():
+        uid = rnd.randint(1, n_users)
+        code = db.session.query(Stock.code).filter(Stock.user_id == uid).limit(1).scalar()
+        Stock.query.filter_by(user_id=uid, code=code).first()
+        db.session.expunge_all()
+
+    def rank_reload():
+        uid = rnd.randint(1, n_users)
+        db.session.query(User.id, User.nickname, User.cash).filter(User.id == uid).all()
+        db.session.query(Stock.user_id, Stock.code, db.func.sum(Stock.quantity)) \
+            .filter(Stock.user_id == uid).group_by(Stock.user_id, Stock.code).all()
+
+    def held_codes():
+        db.session.query(Stock.code).distinct().all()
+
+    def full_refresh():
+        db.session.query(User.id, User.nickname, User.cash).all()
+        db.session.query(Stock.user_id, Stock.code, db.func.sum(Stock.quantity)) \
+            .group_by(Stock.user_id, Stock.code).all()
+
+    return [('load_user', load_user, 1), ('positions', positions, 1), ('trade_lookup', trade_lookup, 1),
+            ('rank_reload', rank_reload, 1), ('held_codes', held_codes, 10), ('full_refresh', full_refresh, 10)]
+
+
+def measure(fn, n):
+    fn()
+    samples = []
+    for _ in range(n):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return statistics.median(samples), samples[int(len(samples) * 0.99) - 1]
+
+
+def set_indexes(enabled):
+    for index in Stock.__table__.indexes:
+        if index.name in STOCK_INDEXES:
+            if enabled:
+                index.create(db.engine, checkfirst=True)
+            else:
+                index.drop(db.engine, checkfirst=True)
+    if db.engine.dialect.name == 'postgresql':
+        db.session.execute(db.text('ANALYZE stock'))
+    else:
+        db.session.execute(db.text('ANALYZE'))
+    db.session.commit()
+
+
+def main():
+    n_users = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    per_user = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    repeat = int(sys.argv[3]) if len(sys.argv) > 3 else 500
+    uri = os.environ.get('BENCH_DATABASE_URL') or f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+    app = make_app(uri)
+    with app.app_context():
+        start = time.perf_counter()
+        seed(n_users, per_user)
+        print(f'{db.engine.dialect.name}: {n_users:,} users x {per_user} stocks '
+              f'(seed {time.perf_counter() - start:.1f}s)')
+        results = {}
+        for label, enabled in (('no index', False), ('indexed', True)):
+            set_indexes(enabled)
+            for name, fn, div in patterns(n_users):
+                results.setdefault(name, {})[label] = measure(fn, max(5, repeat // div))
+        print(f"{'pattern (ms)':<14}{'no-idx p50':>12}{'p99':>12}{'idx p50':>12}{'p99':>12}{'speedup':>10}")
+        for name, r in results.items():
+            (a50, a99), (b50, b99) = r['no index'], r['indexed']
+            print(f'{name:<14}{a50:>12.3f}{a99:>12.3f}{b50:>12.3f}{b99:>12.3f}{a50 / b50:>10.1f}x')
+        db.drop_all()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+"""템플릿 렌더링 벤치마크 (50종목 포트폴리오 / 30카드 게시판).
+
+before: 이전 방식처럼 요청마다 레이아웃 문자열에 본문을 끼워 넣어 render_template_string
+        (소스가 매번 달라 Jinja가 매번 파싱/컴파일)
+after : templates/ 의 컴파일된 템플릿을 render_template 로 재사용
+
+board.html 은 게시판 스냅샷이 캐시해 둔 카드 HTML(cards)을 끼워 넣기만 하므로,
+카드 30장 렌더링 비용은 board_cards.html 줄에 따로 나옴 (스냅샷이 바뀔 때마다 한 번).
+
+    python bench/bench_render.py [반복횟수]
+"""
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('MARKET_INGEST_ENABLED', '0')
+os.environ.setdefault('MARKET_DB_PATH', os.path.join(tempfile.mkdtemp(), 'market.db'))
+
+from flask import render_template, render_template_string  # noqa: E402
+
+import app as trading_app  # noqa: E402
+
+BLOCK = '{% block content %}{% endblock %}'
+
+
+def sample_context(n_holdings=50, n_cards=30, n_ranking=10):
+    # 요청 처리 컨텍스트 안에서 호출 (카드 HTML을 board_cards.html 로 미리 렌더링)
+    holdings = [{'name': f'종목{i}', 'code': f'{i:06d}', 'quantity': 10 + i, 'avg_price': 50000.0 + i,
+                 'price': 51000 + i, 'value': (51000 + i) * (10 + i), 'profit': 1000.0 * (10 + i),
+                 'rate': 1.96, 'weight': 100 / n_holdings} for i in range(n_holdings)]
+    ranking = [{'user_id': i, 'nickname': f'user{i}', 'asset': 1_000_000.0 - i} for i in range(n_ranking)]
+    stocks = [{'Code': f'{i:06d}', 'Name': f'종목{i}', 'Marcap': 1e12, 'Close': 70000.0 + i,
+               'ChagesRatio': 0.5 - i * 0.05, 'Volume': 1_000_000 + i} for i in range(n_cards)]
+    home = dict(holdings=holdings, total_asset=12_345_678, cash=1_000_000, ranking=ranking,
+                my_rank=3, total_ranked=100)
+    cards = render_template('board_cards.html', stocks=stocks)
+    return {'home.html': home, 'board.html': dict(cards=cards, n=n_cards, sort='marcap'),
+            'board_cards.html': dict(stocks=stocks)}
+
+
+def legacy_render(layout_src, name, ctx, nonce):
+    # 본문은 이미 만들어졌다고 치고, 매 요청 다른 소스를 컴파일하는 비용만 재현
+    app = trading_app.app
+    template = app.jinja_env.get_template(name)
+    if 'content' not in template.blocks:
+        # 레이아웃 없는 조각 템플릿은 자기 소스를 매번 다시 컴파일
+        source = app.jinja_env.loader.get_source(app.jinja_env, name)[0]
+        return render_template_string(source + f'{{# {nonce} #}}', **ctx)
+    full = dict(ctx)
+    app.update_template_context(full)
+    body = template.blocks['content'](template.new_context(full))
+    source = layout_src.replace(BLOCK, ''.join(body) + f'<!-- {nonce} -->')
+    return render_template_string(source, **ctx)
+
+
+def timeit(fn, n):
+    fn(0)
+    start = time.perf_counter()
+    for i in range(n):
+        fn(i + 1)
+    return (time.perf_counter() - start) / n * 1000
+
+
+def main(n=200):
+    app = trading_app.app
+    layout_src = open(os.path.join(app.root_path, 'templates', 'layout.html'), encoding='utf-8').read()
+    with app.test_request_context('/'):
+        print(f'{"page":<18}{"before(ms)":>12}{"after(ms)":>12}{"speedup":>10}')
+        for name, ctx in sample_context().items():
+            before = timeit(lambda i: legacy_render(layout_src, name, ctx, i), n)
+            after = timeit(lambda i: render_template(name, **ctx), n)
+            print(f'{name:<18}{before:>12.3f}{after:>12.3f}{before / after:>9.1f}x')
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
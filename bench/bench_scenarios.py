@@ -0,0 +1,184 @@
+"""시나리오 부하 벤치마크 (가짜 시세 + 시드 데이터, 네트워크 없음).
+
+앱을 프로세스 안에서 띄우고(Flask test client) 로그인한 사용자 여러 명이 동시에
+대시보드/게시판/차트/주문을 보내며 p50/p99 지연과 처리량을 잰다.
+
+시나리오
+  dashboard   GET /                     (보유 종목 평가 + 랭킹)
+  board       GET /board                (시총 상위 카드)
+  chart       GET /api/chart/<code>     (저장소에 있는 종목, 기간 섞어서)
+  chart_cold  GET /api/chart/<code>     (처음 보는 종목 -> 가짜 fdr 조회, --latency 만큼 지연)
+  trade       POST /trade               (보유 종목 1주 매수/매도)
+
+    python bench/bench_scenarios.py
+    python bench/bench_scenarios.py --users 2000 --holdings 20 --requests 2000 --concurrency 16
+    python bench/bench_scenarios.py --save baseline.json
+    python bench/bench_scenarios.py --baseline baseline.json --tolerance 1.3   # 느려졌으면 exit 1
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import uuid
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from fake_fdr import FakeFinanceDataReader  # noqa: E402
+from seed import PASSWORD, seed_market, seed_users  # noqa: E402
+
+SCENARIOS = ('dashboard', 'board', 'chart', 'chart_cold', 'trade')
+
+
+def setup(args):
+    # app 모듈은 import 시점에 환경변수를 읽으므로, 시세 저장소를 먼저 채우고 import 한다
+    workdir = tempfile.mkdtemp(prefix='bench-')
+    os.environ.update(DATABASE_URL=f"sqlite:///{os.path.join(workdir, 'stock.db')}",
+                      MARKET_DB_PATH=os.path.join(workdir, 'market.db'),
+                      MARKET_INGEST_ENABLED='1' if args.ingest else '0', CACHE_URL='memory://')
+    os.environ.pop('METRICS_DIR', None)
+
+    from market_store import MarketStore
+    fdr = FakeFinanceDataReader(n_listings=args.listings, seed=args.seed, latency=args.latency,
+                                jitter=args.jitter)
+    store = MarketStore(os.environ['MARKET_DB_PATH'])
+    ingestor = seed_market(store, fdr)
+    held = [r['Code'] for r in store.listing(limit=args.codes)]
+    for code in held:
+        ingestor.refresh_history(code)
+
+    import app as trading_app
+    trading_app.market_ingestor._fdr = fdr
+    with trading_app.app.app_context():
+        seed_users(args.users, args.holdings, held, args.seed, store.listing_closes())
+    cold = [c for c in fdr.codes if c not in set(held)]
+    return trading_app, held, cold, fdr
+
+
+def login(app, user_id):
+    client = app.test_client()
+    resp = client.post('/login', data={'username': f'u{user_id}', 'password': PASSWORD})
+    assert resp.status_code == 302, f'login failed for u{user_id}'
+    return client
+
+
+def make_request(name, held, cold, rnd):
+    if name == 'dashboard':
+        return lambda c: c.get('/')
+    if name == 'board':
+        return lambda c: c.get('/board')
+    if name == 'chart':
+        code, days = rnd.choice(held), rnd.choice((30, 90, 180, 365))
+        return lambda c: c.get(f'/api/chart/{code}?days={days}')
+    if name == 'chart_cold':
+        code = cold.pop() if cold else rnd.choice(held)
+        return lambda c: c.get(f'/api/chart/{code}')
+    if name == 'trade':
+        code, action = rnd.choice(held), rnd.choice(('buy', 'sell'))
+        data = {'code': code, 'quantity': '1', 'action': action, 'idempotency_key': uuid.uuid4().hex}
+        return lambda c: c.post('/trade', data=data)
+    raise ValueError(name)
+
+
+def run_scenario(app, name, clients, n_requests, held, cold, seed=0):
+    rnd = random.Random(seed)
+    jobs = [make_request(name, held, cold, rnd) for _ in range(n_requests)]
+    latencies, errors = [], [0]
+    lock = threading.Lock()
+    cursor = iter(jobs)
+
+    def worker(client):
+        while True:
+            with lock:
+                job = next(cursor, None)
+            if job is None:
+                return
+            start = time.perf_counter()
+            resp = job(client)
+            elapsed = time.perf_counter() - start
+            with lock:
+                latencies.append(elapsed)
+                if resp.status_code >= 400 and resp.status_code != 404:
+                    errors[0] += 1
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker, args=(c,)) for c in clients]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - started
+    latencies.sort()
+    return {
+        'requests': len(latencies),
+        'errors': errors[0],
+        'p50_ms': statistics.median(latencies) * 1000,
+        'p99_ms': latencies[max(0, int(len(latencies) * 0.99) - 1)] * 1000,
+        'rps': len(latencies) / wall,
+    }
+
+
+def compare(results, baseline, tolerance):
+    regressions = []
+    for name, r in results.items():
+        base = baseline.get(name)
+        if base and r['p50_ms'] > base['p50_ms'] * tolerance:
+            regressions.append(f"{name}: p50 {base['p50_ms']:.2f} -> {r['p50_ms']:.2f} ms")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='시나리오 부하 벤치마크')
+    parser.add_argument('--users', type=int, default=500)
+    parser.add_argument('--holdings', type=int, default=10)
+    parser.add_argument('--codes', type=int, default=100, help='보유/차트 대상 상위 종목 수')
+    parser.add_argument('--listings', type=int, default=2000)
+    parser.add_argument('--requests', type=int, default=500, help='시나리오당 요청 수')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--latency', type=float, default=0.05, help='가짜 fdr 호출 지연(초)')
+    parser.add_argument('--jitter', type=float, default=0.0)
+    parser.add_argument('--scenario', action='append', choices=SCENARIOS)
+    parser.add_argument('--ingest', action='store_true', help='백그라운드 수집 스레드도 켜기')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--save', help='결과를 JSON으로 저장 (기준선)')
+    parser.add_argument('--baseline', help='기준선 JSON과 비교')
+    parser.add_argument('--tolerance', type=float, default=1.3)
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    trading_app, held, cold, fdr = setup(args)
+    app = trading_app.app
+    clients = [login(app, 1 + i % args.users) for i in range(args.concurrency)]
+    print(f'{args.users} users x {args.holdings} holdings, {args.listings} listings, '
+          f'concurrency {args.concurrency}, fdr latency {args.latency * 1000:.0f} ms '
+          f'(setup {time.perf_counter() - started:.1f}s)')
+
+    results = {}
+    print(f"{'scenario':<12}{'requests':>9}{'errors':>8}{'p50 ms':>10}{'p99 ms':>10}{'req/s':>10}")
+    for name in args.scenario or SCENARIOS:
+        n = min(args.requests, 100) if name == 'chart_cold' else args.requests
+        run_scenario(app, name, clients, max(1, n // 10), held, cold, args.seed + 1)   # 예열
+        r = results[name] = run_scenario(app, name, clients, n, held, cold, args.seed)
+        print(f"{name:<12}{r['requests']:>9}{r['errors']:>8}{r['p50_ms']:>10.2f}{r['p99_ms']:>10.2f}"
+              f"{r['rps']:>10.0f}")
+    print(f"fdr calls: {fdr.calls}")
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(results, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for line in regressions:
+            print(f'REGRESSION {line}')
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
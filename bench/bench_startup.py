@@ -0,0 +1,39 @@
+"""앱 콜드 스타트(import app) 시간 측정.
+
+새 프로세스에서 `import app` 에 걸리는 시간을 여러 번 재서 중앙값을 출력한다.
+종목 목록은 로컬 스냅샷(market.db)에서 읽으므로 네트워크 상태와 무관해야 한다.
+
+    python bench/bench_startup.py [반복횟수]
+"""
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SNIPPET = """
+import time
+t = time.perf_counter()
+import app
+print((time.perf_counter() - t) * 1000)
+"""
+
+
+def main(n=5):
+    workdir = tempfile.mkdtemp()
+    env = dict(os.environ, PYTHONPATH=ROOT, MARKET_DB_PATH=os.path.join(workdir, 'market.db'),
+               DATABASE_URL=f"sqlite:///{os.path.join(workdir, 'stock.db')}", MARKET_INGEST_ENABLED='0')
+    # 첫 실행은 바이트코드 컴파일/DB 생성이 섞이므로 버림
+    subprocess.run([sys.executable, '-c', SNIPPET], env=env, cwd=workdir, capture_output=True, check=True)
+    samples = []
+    for _ in range(n):
+        out = subprocess.run([sys.executable, '-c', SNIPPET], env=env, cwd=workdir,
+                             capture_output=True, text=True, check=True).stdout
+        samples.append(float(out.strip().splitlines()[-1]))
+    print(f'import app: median {statistics.median(samples):.0f} ms (min {min(samples):.0f}, max {max(samples):.0f})')
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
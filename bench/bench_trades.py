@@ -0,0 +1,123 @@
+"""주문 체결 엔진 동시성 부하 테스트.
+
+여러 스레드에서 수천 건의 매수/매도(일부는 같은 멱등성 키로 재전송)를 동시에 넣고
+체결 후 불변식을 검사한다.
+  - 현금 >= 0, 보유 수량 > 0, (user_id, code) 중복 행 없음
+  - 가격이 고정이므로 사용자별 현금 + 평가금액 == 초기 자금
+  - 같은 키로 재전송된 주문은 한 번만 체결
+  - 체결 원장(Trade)만으로 다시 계산한 현금/보유 수량이 실제 값과 같음
+
+    python bench/bench_trades.py [주문수] [스레드수]
+    BENCH_DATABASE_URL=postgresql://... python bench/bench_trades.py   # Postgres로 실행 (빈 DB만, 끝나면 테이블 삭제)
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask  # noqa: E402
+
+from models import db, init_db, User, Stock, OrderRequest  # noqa: E402
+from trading import execute_order, rebuild_positions  # noqa: E402
+from seed import require_empty_db  # noqa: E402
+
+INITIAL_CASH = 1_000_000.0
+PRICES = {'005930': 70000, '000660': 120000, '035420': 200000, '051910': 400000}
+
+
+def make_app(uri):
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = uri
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    db.init_app(app)
+    with app.app_context():
+        require_empty_db()
+        db.drop_all()
+        init_db()
+    return app
+
+
+def seed(app, n_users):
+    with app.app_context():
+        db.session.add_all(User(username=f'u{i}', password_hash='x', nickname=f'u{i}', cash=INITIAL_CASH)
+                           for i in range(n_users))
+        db.session.commit()
+        return [u.id for u in User.query.all()]
+
+
+def make_orders(user_ids, n, seed=42):
+    rnd = random.Random(seed)
+    orders = []
+    for i in range(n):
+        code = rnd.choice(list(PRICES))
+        order = (rnd.choice(user_ids), rnd.choice(['buy', 'buy', 'sell']), code, rnd.randint(1, 5), f'k{i}')
+        orders.append(order)
+        if rnd.random() < 0.1:
+            orders.append(order)  # 더블클릭/새로고침 재전송
+    rnd.shuffle(orders)
+    return orders
+
+
+def check_invariants(app):
+    errors = []
+    with app.app_context():
+        holdings = {}
+        for s in Stock.query.all():
+            if s.quantity <= 0:
+                errors.append(f'non-positive quantity: {s.user_id}/{s.code}={s.quantity}')
+            key = (s.user_id, s.code)
+            if key in holdings:
+                errors.append(f'duplicate position row: {key}')
+            holdings[key] = s.quantity
+        for u in User.query.all():
+            if u.cash < 0:
+                errors.append(f'negative cash: user {u.id}')
+            total = u.cash + sum(q * PRICES[c] for (uid, c), q in holdings.items() if uid == u.id)
+            if abs(total - INITIAL_CASH) > 1e-6:
+                errors.append(f'value not conserved: user {u.id} {total}')
+            cash, positions = rebuild_positions(u.id, INITIAL_CASH)
+            mine = {c: q for (uid, c), q in holdings.items() if uid == u.id}
+            if abs(cash - u.cash) > 1e-6 or {c: p[0] for c, p in positions.items()} != mine:
+                errors.append(f'ledger mismatch: user {u.id}')
+        executed = OrderRequest.query.count()
+    return errors, executed
+
+
+def main(n_orders=5000, threads=32):
+    uri = os.environ.get('BENCH_DATABASE_URL') or f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+    app = make_app(uri)
+    user_ids = seed(app, 50)
+    orders = make_orders(user_ids, n_orders)
+
+    def run(order):
+        user_id, action, code, qty, key = order
+        with app.app_context():
+            return execute_order(user_id, action, code, qty, PRICES[code], code, idempotency_key=key)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        results = list(pool.map(run, orders))
+    elapsed = time.perf_counter() - start
+
+    errors, executed = check_invariants(app)
+    unique_keys = len({o[4] for o in orders})
+    if executed != unique_keys:
+        errors.append(f'idempotency: {executed} recorded orders for {unique_keys} unique keys')
+    filled = sum(r.ok for r in results)
+    print(f'{uri.split(":")[0]}: {len(orders)} orders ({unique_keys} unique), {threads} threads, '
+          f'{elapsed:.2f}s, {len(orders) / elapsed:.0f} orders/s, {filled} filled')
+    for e in errors[:20]:
+        print('  FAIL', e)
+    print('invariants OK' if not errors else f'{len(errors)} invariant violations')
+    with app.app_context():
+        db.drop_all()
+    return not errors
+
+
+if __name__ == '__main__':
+    args = [int(a) for a in sys.argv[1:3]]
+    sys.exit(0 if main(*args) else 1)
@@ -0,0 +1,100 @@
+"""포트폴리오 평가 벤치마크 (기본 10만 보유 내역 / 1만 명 / 2천 종목).
+
+before: 이전 home()/랭킹처럼 보유 종목 한 줄씩 파이썬 루프로 평가금액/손익/수익률/합계 계산
+after : valuation.py 로 보유 내역 전체를 시세 벡터와 한 번에 계산
+
+사용자 1명(home())과 리더보드 합계는 루프가 더 빨라서 루프를 그대로 씀 (아래 두 줄로 확인).
+
+    python bench/bench_valuation.py [보유내역수] [사용자수] [종목수]
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from valuation import positions_frame, user_totals, value_positions, value_rows  # noqa: E402
+
+
+def make_data(n_positions, n_users, n_codes, seed=0):
+    rng = np.random.default_rng(seed)
+    codes = [f'{i:06d}' for i in range(n_codes)]
+    rows = [(int(u), codes[c], f'종목{c}', int(q), float(p)) for u, c, q, p in zip(
+        rng.integers(0, n_users, n_positions), rng.integers(0, n_codes, n_positions),
+        rng.integers(1, 500, n_positions), rng.uniform(1000, 100000, n_positions).round())]
+    prices = {code: int(p) for code, p in zip(codes, rng.uniform(1000, 100000, n_codes))}
+    cash = {u: 1_000_000.0 for u in range(n_users)}
+    return rows, prices, cash
+
+
+def loop_valuation(rows, prices, cash):
+    holdings = {}
+    totals = {uid: {'cash': c, 'value': 0, 'cost': 0} for uid, c in cash.items()}
+    for uid, code, name, qty, avg in rows:
+        price = prices.get(code, 0)
+        val = price * qty
+        cost = avg * qty
+        profit = val - cost
+        holdings.setdefault(uid, []).append({'code': code, 'name': name, 'price': price, 'value': val,
+                                             'profit': profit, 'rate': (profit / cost * 100) if qty > 0 else 0})
+        t = totals[uid]
+        t['value'] += val
+        t['cost'] += cost
+    for uid, items in holdings.items():
+        for h in items:
+            h['weight'] = h['value'] / totals[uid]['value'] * 100 if totals[uid]['value'] else 0
+    return {uid: t['cash'] + t['value'] for uid, t in totals.items()}
+
+
+def vector_valuation(rows, prices, cash):
+    valued = value_positions(positions_frame(rows), prices)
+    return user_totals(valued, cash)['total_asset']
+
+
+def leaderboard_loop(cash, holdings, prices):
+    return {uid: cash[uid] + sum(q * prices.get(c, 0) for c, q in holdings.get(uid, {}).items()) for uid in cash}
+
+
+def best_of(fn, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    n_positions = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    n_users = int(sys.argv[2]) if len(sys.argv) > 2 else 10_000
+    n_codes = int(sys.argv[3]) if len(sys.argv) > 3 else 2_000
+    rows, prices, cash = make_data(n_positions, n_users, n_codes)
+    holdings = {}
+    for uid, code, _, qty, _ in rows:
+        h = holdings.setdefault(uid, {})
+        h[code] = h.get(code, 0) + qty
+
+    print(f'{n_positions:,} positions / {n_users:,} users / {n_codes:,} codes')
+    t_loop, a = best_of(lambda: loop_valuation(rows, prices, cash))
+    t_vec, b = best_of(lambda: vector_valuation(rows, prices, cash))
+    assert all(abs(a[u] - b[u]) < 1e-3 * max(1.0, abs(a[u])) for u in cash)
+    print(f'  positions+totals  loop {t_loop * 1000:8.1f} ms   vectorized {t_vec * 1000:8.1f} ms   x{t_loop / t_vec:.1f}')
+
+    # home() 한 번 = 사용자 1명의 몇 종목 (고정 비용이 작아야 함)
+    small = [r for r in rows if r[0] == rows[0][0]]
+    small_cash = {rows[0][0]: cash[rows[0][0]]}
+    # home()은 value_rows (루프), /api/portfolio 와 전체 분석은 value_positions (벡터)
+    small_rows = [(code, name, qty, avg) for _, code, name, qty, avg in small]
+    t_loop, _ = best_of(lambda: value_rows(small_rows, prices), repeat=200)
+    t_vec, _ = best_of(lambda: vector_valuation(small, prices, small_cash), repeat=200)
+    print(f'  one user ({len(small)} rows)  loop {t_loop * 1000:8.3f} ms   vectorized {t_vec * 1000:8.3f} ms')
+
+    # Leaderboard.refresh 는 dict 루프 (배열로 펼치는 비용이 커서 벡터 연산이 이기지 못함)
+    t_loop, _ = best_of(lambda: leaderboard_loop(cash, holdings, prices))
+    print(f'  leaderboard total loop {t_loop * 1000:8.1f} ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+"""gunicorn 워커 수에 따른 처리량(requests/sec) 측정.
+
+임시 DB/시세 저장소를 만들어 두고(네트워크 수집 끔) 워커 수를 바꿔 가며
+gunicorn을 띄운 뒤, 로그인한 세션으로 대시보드와 차트 API를 동시에 두드린다.
+
+    python bench/bench_workers.py [워커수 목록(쉼표)] [초] [동시접속]
+    python bench/bench_workers.py 1,2,4 10 32
+"""
+import http.client
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.parse
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from flask import Flask  # noqa: E402
+
+from fake_fdr import FakeFinanceDataReader  # noqa: E402
+from market_store import MarketStore  # noqa: E402
+from models import db  # noqa: E402
+from seed import PASSWORD, seed_market, seed_users  # noqa: E402
+
+PORT = 5055
+
+
+def seed(workdir):
+    # 가짜 fdr 시세 50종목 + 사용자 200명 x 20종목
+    store = MarketStore(os.path.join(workdir, 'market.db'))
+    ingestor = seed_market(store, FakeFinanceDataReader(n_listings=50))
+    codes = [r['Code'] for r in store.listing()]
+    for c in codes:
+        ingestor.refresh_history(c)
+
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(workdir, 'stock.db')}"
+    db.init_app(app)
+    with app.app_context():
+        seed_users(200, 20, codes, prices=store.listing_closes())
+    return codes
+
+
+def login():
+    conn = http.client.HTTPConnection('127.0.0.1', PORT, timeout=10)
+    conn.request('POST', '/login', urllib.parse.urlencode({'username': 'u1', 'password': PASSWORD}),
+                 {'Content-Type': 'application/x-www-form-urlencoded'})
+    resp = conn.getresponse()
+    resp.read()
+    return resp.getheader('Set-Cookie').split(';')[0]
+
+
+def wait_ready(timeout=60):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            return login()
+        except (OSError, AttributeError):
+            time.sleep(0.5)
+    raise RuntimeError('gunicorn did not start')
+
+
+def hammer(cookie, seconds, concurrency, codes):
+    counts, stop = [0] * concurrency, time.time() + seconds
+    paths = ['/'] + [f'/api/chart/{c}?days=180' for c in codes[:5]]
+
+    def worker(n):
+        conn = http.client.HTTPConnection('127.0.0.1', PORT, timeout=30)
+        i = n
+        while time.time() < stop:
+            try:
+                conn.request('GET', paths[i % len(paths)], headers={'Cookie': cookie})
+                conn.getresponse().read()
+                counts[n] += 1
+            except (http.client.HTTPException, OSError):
+                # 워커 재시작(max_requests)/keep-alive 만료 시 다시 연결
+                conn.close()
+                conn = http.client.HTTPConnection('127.0.0.1', PORT, timeout=30)
+            i += 1
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return sum(counts) / seconds
+
+
+def main(worker_counts=(1, 2, 4), seconds=10, concurrency=32):
+    workdir = tempfile.mkdtemp()
+    codes = seed(workdir)
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{os.path.join(workdir, 'stock.db')}",
+               MARKET_DB_PATH=os.path.join(workdir, 'market.db'), MARKET_INGEST_ENABLED='0',
+               CACHE_URL=f"file://{os.path.join(workdir, 'shared.cache')}", BIND=f'127.0.0.1:{PORT}')
+    print(f'{"workers":>8}{"req/s":>10}')
+    for n in worker_counts:
+        proc = subprocess.Popen([sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'wsgi:app'],
+                                cwd=ROOT, env=dict(env, WEB_CONCURRENCY=str(n)),
+                                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            rps = hammer(wait_ready(), seconds, concurrency, codes)
+            print(f'{n:>8}{rps:>10.0f}')
+        finally:
+            proc.terminate()
+            proc.wait()
+
+
+if __name__ == '__main__':
+    counts = tuple(int(x) for x in sys.argv[1].split(',')) if len(sys.argv) > 1 else (1, 2, 4)
+    rest = [int(a) for a in sys.argv[2:4]]
+    main(counts, *rest)
@@ -0,0 +1,91 @@
+"""FinanceDataReader 대역 (벤치마크/부하 테스트용).
+
+KRX에 접속하지 않고, 같은 seed면 항상 같은 종목 목록과 일봉을 만든다.
+latency/jitter로 실제 조회처럼 호출마다 지연을 넣을 수 있다.
+
+    from fake_fdr import FakeFinanceDataReader
+    fdr = FakeFinanceDataReader(n_listings=2000, latency=0.2)
+    market_ingestor = MarketIngestor(store, fdr=fdr)
+"""
+import random
+import threading
+import time
+import zlib
+
+import numpy as np
+import pandas as pd
+
+MARKETS = ('KOSPI', 'KOSDAQ')
+
+
+class FakeFinanceDataReader:
+    def __init__(self, n_listings=2000, seed=0, latency=0.0, jitter=0.0, today=None, history_days=400):
+        self.n_listings = n_listings
+        self.history_days = history_days
+        self.seed = seed
+        self.latency = latency
+        self.jitter = jitter
+        self.today = pd.Timestamp(today or pd.Timestamp.today()).normalize()
+        self.codes = [f'{i:06d}' for i in range(1, n_listings + 1)]
+        self.calls = {'StockListing': 0, 'DataReader': 0}
+        self._lock = threading.Lock()
+        self._rnd = random.Random(seed)
+        self._cache = {}
+
+    def _wait(self, name):
+        with self._lock:
+            self.calls[name] += 1
+            delay = self.latency + (self._rnd.uniform(0, self.jitter) if self.jitter else 0.0)
+        if delay > 0:
+            time.sleep(delay)
+
+    def _rng(self, code, stream=0):
+        return np.random.default_rng([self.seed, zlib.crc32(code.encode()), stream])
+
+    def _closes(self, code):
+        # 종목마다 고정된 랜덤워크 (기준가 1천~20만원, 일 변동 ~2%). 목록과 일봉이 같은 값을 쓰도록 캐시
+        closes = self._cache.get(code)
+        if closes is None:
+            rng = self._rng(code)
+            walk = np.exp(np.cumsum(rng.normal(0, 0.02, self.history_days)))
+            closes = self._cache[code] = np.maximum(rng.uniform(1_000, 200_000) * walk, 100).round()
+        return closes
+
+    def _series(self, code):
+        close = self._closes(code)
+        days = len(close)
+        rng = self._rng(code, 1)
+        return pd.DataFrame({
+            'Open': close * (1 + rng.normal(0, 0.005, days)),
+            'High': close * (1 + np.abs(rng.normal(0, 0.01, days))),
+            'Low': close * (1 - np.abs(rng.normal(0, 0.01, days))),
+            'Close': close,
+            'Volume': rng.integers(1_000, 5_000_000, days),
+            'Change': np.r_[0.0, np.diff(close) / close[:-1]],
+        }, index=pd.bdate_range(end=self.today, periods=days))
+
+    def StockListing(self, market='KRX'):
+        self._wait('StockListing')
+        rows = []
+        for i, code in enumerate(self.codes):
+            closes = self._closes(code)
+            close, prev = float(closes[-1]), float(closes[-2])
+            rows.append({'Code': code, 'Name': f'종목{code}', 'Market': MARKETS[i % len(MARKETS)],
+                         'Close': close, 'ChagesRatio': round((close / prev - 1) * 100, 2),
+                         'Changes': close - prev, 'Volume': 1_000 * (self.n_listings - i),
+                         'Marcap': close * (10_000_000 - i * 1000)})
+        df = pd.DataFrame(rows)
+        if market not in ('KRX', None):
+            df = df[df['Market'] == market].reset_index(drop=True)
+        return df
+
+    def DataReader(self, code, start=None, end=None):
+        self._wait('DataReader')
+        if code not in self.codes:
+            raise ValueError(f'unknown code: {code}')
+        df = self._series(code)
+        if start is not None:
+            df = df[df.index >= pd.Timestamp(start)]
+        if end is not None:
+            df = df[df.index <= pd.Timestamp(end)]
+        return df
@@ -0,0 +1,95 @@
+"""벤치마크용 시드 데이터 (사용자 N명 x 보유 종목 M개, 가짜 시세 저장소).
+
+    python bench/seed.py --users 1000 --holdings 10 --db sqlite:///bench.db --market bench_market.db
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from werkzeug.security import generate_password_hash  # noqa: E402
+
+from fake_fdr import FakeFinanceDataReader  # noqa: E402
+from market_store import MarketIngestor, MarketStore  # noqa: E402
+from models import db, init_db, User, Stock  # noqa: E402
+
+PASSWORD = 'pw'
+INITIAL_CASH = 1_000_000.0
+
+
+def require_empty_db():
+    """drop_all 하는 벤치 전에 호출: 데이터가 들어 있는 DB(운영 DB 등)면 중단.
+
+    벤치는 DATABASE_URL(앱 DB)이 아니라 BENCH_DATABASE_URL만 읽지만, 실수로 같은 주소를 넣어도 지우지 않도록.
+    """
+    insp = db.inspect(db.engine)
+    for table in db.metadata.sorted_tables:
+        if insp.has_table(table.name) and db.session.query(table).limit(1).first() is not None:
+            raise SystemExit(f'{db.engine.url!r}: {table.name} 테이블에 데이터가 있습니다. '
+                             '비어 있는 벤치마크 전용 DB를 BENCH_DATABASE_URL로 지정하세요.')
+
+
+def seed_market(store, fdr, history_days=365):
+    # 가짜 fdr로 종목 목록을 채우고, 일봉은 돌려준 수집기로 필요한 종목만 받음
+    ingestor = MarketIngestor(store, fdr=fdr, history_days=history_days)
+    ingestor.refresh_listing()
+    return ingestor
+
+
+def seed_users(n_users, holdings, codes, seed=0, prices=None):
+    """사용자 u1..uN (비밀번호 'pw')과 사용자당 holdings개 보유 종목을 한 번에 INSERT.
+
+    앱 컨텍스트 안에서 호출. 비밀번호 해시는 한 번만 계산해서 모든 사용자에 씀.
+    """
+    rnd = random.Random(seed)
+    pw = generate_password_hash(PASSWORD)
+    prices = prices or {}
+    init_db()
+    db.session.execute(User.__table__.insert(), [
+        {'id': i, 'username': f'u{i}', 'password_hash': pw, 'nickname': f'user{i}', 'cash': INITIAL_CASH}
+        for i in range(1, n_users + 1)])
+    stocks = []
+    for uid in range(1, n_users + 1):
+        for code in rnd.sample(codes, min(holdings, len(codes))):
+            base = prices.get(code, 10_000)
+            stocks.append({'user_id': uid, 'code': code, 'name': f'종목{code}', 'quantity': rnd.randint(1, 100),
+                           'avg_price': round(base * rnd.uniform(0.8, 1.2))})
+    if stocks:
+        db.session.execute(Stock.__table__.insert(), stocks)
+    db.session.commit()
+    return n_users, len(stocks)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='벤치마크용 시드 데이터 생성')
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--holdings', type=int, default=10)
+    parser.add_argument('--codes', type=int, default=200, help='보유 종목을 고를 상위 종목 수')
+    parser.add_argument('--listings', type=int, default=2000)
+    parser.add_argument('--db', default='sqlite:///bench.db')
+    parser.add_argument('--market', default='bench_market.db')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    from flask import Flask
+    started = time.perf_counter()
+    fdr = FakeFinanceDataReader(n_listings=args.listings, seed=args.seed)
+    store = MarketStore(args.market)
+    ingestor = seed_market(store, fdr)
+    codes = [r['Code'] for r in store.listing(limit=args.codes)]
+    for code in codes:
+        ingestor.refresh_history(code)
+
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = args.db
+    db.init_app(app)
+    with app.app_context():
+        users, stocks = seed_users(args.users, args.holdings, codes, args.seed, store.listing_closes())
+    print(f'{users} users / {stocks} holdings / {args.listings} listings ({time.perf_counter() - started:.1f}s)')
+
+
+if __name__ == '__main__':
+    main()
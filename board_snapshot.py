@@ -0,0 +1,89 @@
+import threading
+import time
+
+
+# ==========================================
+# 게시판 상위 N 스냅샷 (정렬 기준별 순위 + 카드 HTML 캐시)
+# ==========================================
+SORT_KEYS = {
+    'marcap': 'Marcap',         # 시가총액
+    'change': 'ChagesRatio',    # 등락률
+    'volume': 'Volume',         # 거래량
+}
+
+
+class _Snapshot:
+    # 한 번 읽은 목록과, 그 목록에서 계산한 정렬 순서/카드 HTML (reload 때 통째로 교체)
+    __slots__ = ('version', 'rows', 'sorted', 'cards')
+
+    def __init__(self, version, rows):
+        self.version = version
+        self.rows = rows
+        self.sorted = {}
+        self.cards = {}
+
+
+class BoardSnapshot:
+    """시장 전체 종목 목록을 한 번 읽어 두고, 모든 요청/사용자가 같은 스냅샷을 씀.
+
+    - interval(): 저장소 갱신 여부를 확인하는 주기(초). 장중에는 짧게, 장외에는 길게.
+    - 정렬 기준별 순위는 스냅샷마다 한 번만 계산하고, N은 그 앞부분만 잘라 씀.
+    - render(stocks) -> 카드 HTML. (정렬 기준, N)별로 스냅샷 버전이 바뀔 때까지 재사용.
+    - 요청마다 스냅샷 객체 하나를 잡고 그 안에서만 읽고 쓰므로, 도중에 reload가 일어나도
+      예전 목록의 순서/카드가 새 버전에 섞이지 않음.
+    """
+
+    def __init__(self, store, market='KOSPI', interval=lambda: 60.0, render=None, clock=time.monotonic):
+        self.store = store
+        self.market = market
+        self.interval = interval
+        self.render = render
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._snap = _Snapshot(None, [])
+        self._checked_at = None
+        self.reload()
+
+    @property
+    def version(self):
+        return self._snap.version
+
+    def reload(self):
+        version = self.store.listing_updated_at()
+        if version != self._snap.version:
+            self._snap = _Snapshot(version, self.store.listing(self.market))
+        self._checked_at = self._clock()
+
+    def maybe_reload(self):
+        # 확인 주기가 지났으면 한 요청만 저장소를 확인하고, 나머지는 기존 스냅샷을 그대로 씀
+        # (아직 목록이 비어 있으면(콜드 스타트) 주기와 상관없이 매번 확인)
+        due = self._snap.version is None or self._clock() - self._checked_at >= self.interval()
+        if due and self._lock.acquire(blocking=False):
+            try:
+                self.reload()
+            finally:
+                self._lock.release()
+
+    def _ordered(self, snap, sort):
+        ordered = snap.sorted.get(sort)
+        if ordered is None:
+            field = SORT_KEYS[sort]
+            ordered = sorted(snap.rows, key=lambda r: r[field] if r[field] is not None else float('-inf'),
+                             reverse=True)
+            snap.sorted[sort] = ordered
+        return ordered
+
+    def snapshot(self):
+        self.maybe_reload()
+        return self._snap
+
+    def top(self, n=30, sort='marcap', snap=None):
+        return self._ordered(snap or self.snapshot(), sort)[:n]
+
+    def cards(self, n=30, sort='marcap'):
+        snap = self.snapshot()
+        key = (sort, n)
+        html = snap.cards.get(key)
+        if html is None:
+            html = snap.cards[key] = self.render(self._ordered(snap, sort)[:n])
+        return html
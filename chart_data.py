@@ -0,0 +1,122 @@
+import hashlib
+import struct
+import threading
+import time
+from datetime import date
+
+import numpy as np
+
+
+# ==========================================
+# 차트 히스토리 가공 (다운샘플링 / 압축 인코딩 / 캐시)
+# ==========================================
+def lttb(x, y, n):
+    # Largest-Triangle-Three-Buckets: 모양을 유지하면서 n개 점으로 줄임
+    size = len(x)
+    if n >= size or n < 3:
+        return np.arange(size)
+    keep = np.empty(n, dtype=np.int64)
+    keep[0], keep[-1] = 0, size - 1
+    edges = np.linspace(1, size - 1, n - 1).astype(np.int64)
+    a = 0
+    for i in range(n - 2):
+        lo, hi = edges[i], edges[i + 1]
+        nlo, nhi = edges[i + 1], (edges[i + 2] if i + 2 < n - 1 else size)
+        avg_x, avg_y = x[nlo:nhi].mean(), y[nlo:nhi].mean()
+        area = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(area.argmax())
+        keep[i + 1] = a
+    return keep
+
+
+def minmax(x, y, n):
+    # 구간마다 최저/최고점을 남김 (급등락을 놓치지 않음)
+    size = len(x)
+    if n >= size or n < 4:
+        return np.arange(size)
+    buckets = np.array_split(np.arange(1, size - 1), (n - 2) // 2)
+    keep = [0]
+    for b in buckets:
+        if len(b):
+            keep.extend(sorted({int(b[y[b].argmin()]), int(b[y[b].argmax()])}))
+    keep.append(size - 1)
+    return np.asarray(keep)
+
+
+DOWNSAMPLERS = {'lttb': lttb, 'minmax': minmax}
+
+
+def build_series(rows, points=None, method='lttb'):
+    # rows: [(YYYY-MM-DD, close), ...] -> (epoch-day int32 배열, float32 종가 배열)
+    if not rows:
+        return np.empty(0, dtype=np.int32), np.empty(0, dtype=np.float32)
+    dates, closes = zip(*rows)
+    days = np.array(dates, dtype='datetime64[D]').astype(np.int32)
+    prices = np.array(closes, dtype=np.float64)
+    if points and len(days) > points:
+        idx = DOWNSAMPLERS[method](days.astype(np.float64), prices, points)
+        days, prices = days[idx], prices[idx]
+    return days, prices.astype(np.float32)
+
+
+def encode(code, days, prices, fmt='json'):
+    """응답 본문 생성.
+
+    - json:    기존 형식 {'labels': ['YYYY-MM-DD', ...], 'prices': [...]}
+    - compact: 컬럼형 {'code', 'days': [epoch-day], 'close': [...]}
+    - f32:     바이너리 (uint32 개수, int32 epoch-day 배열, float32 종가 배열; little-endian)
+    """
+    if fmt == 'f32':
+        return (struct.pack('<I', len(days)) + days.astype('<i4').tobytes()
+                + prices.astype('<f4').tobytes())
+    close = [round(float(p), 2) for p in prices]
+    if fmt == 'compact':
+        return {'code': code, 'days': days.tolist(), 'close': close}
+    labels = np.datetime_as_string(days.astype('datetime64[D]')).tolist()
+    return {'labels': labels, 'prices': close}
+
+
+class ChartCache:
+    """(종목, 기간, 점 개수, 방식, 형식) 단위 응답 캐시.
+
+    항목은 epoch() 값이 바뀌면 다시 만든다. 기본은 날짜(하루에 한 번)이고,
+    앱에서는 MarketSchedule.epoch를 넘겨 장중에는 수집 주기마다, 장외에는 다음 개장 때 바뀌게 한다.
+    일봉이 없는 결과도 캐싱해서 같은 종목 요청마다 외부 조회가 나가지 않게 하되, 첫 수집이 늦었던
+    종목이 다음 개장까지 빈 차트로 남지 않도록 empty_ttl(초)이 지나면 다시 읽는다.
+    """
+
+    def __init__(self, load_rows, maxsize=512, epoch=date.today, empty_ttl=600.0, clock=time.monotonic):
+        self._load_rows = load_rows
+        self.maxsize = maxsize
+        self._epoch = epoch
+        self.empty_ttl = empty_ttl
+        self._clock = clock
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def get(self, code, days, points=None, method='lttb', fmt='json'):
+        key = (code, days, points, method, fmt)
+        epoch = self._epoch()
+        with self._lock:
+            hit = self._data.get(key)
+        if hit is not None and hit[0] == epoch and (hit[3] is None or hit[3] > self._clock()):
+            return hit[1], hit[2]
+
+        rows = self._load_rows(code, days)
+        body = encode(code, *build_series(rows, points, method), fmt=fmt)
+        last = rows[-1] if rows else ('', 0)
+        etag = hashlib.sha1(repr((key, len(rows), last)).encode()).hexdigest()[:16]
+        expires = None if rows else self._clock() + self.empty_ttl
+        with self._lock:
+            if key not in self._data and len(self._data) >= self.maxsize:
+                self._data.pop(next(iter(self._data)))
+            self._data[key] = (epoch, body, etag, expires)
+        return body, etag
+
+    def invalidate(self, code=None):
+        with self._lock:
+            if code is None:
+                self._data.clear()
+            else:
+                for key in [k for k in self._data if k[0] == code]:
+                    del self._data[key]
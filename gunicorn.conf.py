@@ -0,0 +1,41 @@
+import multiprocessing
+import os
+
+# ==========================================
+# 운영 서빙 설정 (gunicorn)
+# ==========================================
+bind = os.environ.get('BIND', '0.0.0.0:5000')
+
+# 워커 = 프로세스 수, 스레드 = 워커당 동시 요청 수.
+# 시세 조회처럼 I/O 대기가 많은 요청은 스레드(gthread)로 겹쳐서 처리한다.
+# /api/stream(SSE) 연결은 열려 있는 동안 스레드 하나를 쓰므로 동시 접속 화면 수만큼 여유를 둔다.
+# (스트림은 워커당 LIVE_MAX_STREAMS, 기본 스레드의 절반까지만 받고 나머지는 일반 요청용으로 남김)
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.environ.get('GUNICORN_THREADS', 16))
+worker_class = 'gthread' if threads > 1 else 'sync'
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+graceful_timeout = 20
+keepalive = 5
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 2000))
+max_requests_jitter = 200
+
+accesslog = '-'
+errorlog = '-'
+loglevel = os.environ.get('LOG_LEVEL', 'info')
+
+# 워커 여러 개가 캐시를 따로 들고 있지 않도록 공유 캐시/수집 잠금 기본값
+os.environ.setdefault('CACHE_URL', 'file:///dev/shm/devops-trader.cache')
+os.environ.setdefault('MARKET_INGEST_LOCK', '/tmp/devops-trader-ingest.lock')
+os.environ.setdefault('METRICS_DIR', '/dev/shm/devops-trader-metrics')
+# 워커들이 동시에 import 하며 create_all 하지 않도록 스키마 생성 잠금
+os.environ.setdefault('DB_INIT_LOCK', '/tmp/devops-trader-initdb.lock')
+
+
+# preload 하지 않음: DB 커넥션/스레드는 fork 이후 각 워커에서 만든다
+preload_app = False
+
+
+def on_starting(server):
+    # 이전 실행에서 남은 워커별 /metrics 스냅샷 정리
+    import shutil
+    shutil.rmtree(os.environ['METRICS_DIR'], ignore_errors=True)
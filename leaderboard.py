@@ -0,0 +1,162 @@
+import threading
+import time
+from bisect import bisect_left, insort
+
+
+# ==========================================
+# 자산 랭킹 (정렬 상태를 유지하는 리더보드)
+# ==========================================
+class Leaderboard:
+    """사용자별 총자산을 정렬된 상태로 유지.
+
+    - load_positions(user_id=None) -> (users, holdings)
+        users    = {user_id: (nickname, cash)}
+        holdings = {user_id: {code: (quantity, cost)}}   (종목별로 합산된 수량과 매입금액 Σ 수량 x 평균단가)
+    - get_prices(codes) -> {code: price} (시세를 못 받은 종목은 None -> 반영하지 않음)
+    - 시세를 한 번도 못 받은 종목은 매입금액으로 평가 (valuation.value_positions와 같은 규칙)
+
+    전체 재계산은 max_age가 지난 뒤 들어온 요청이 백그라운드 스레드로 한 번만 돌리고(ensure_fresh),
+    시세가 바뀌면 종목별 보유 역인덱스(code -> {user_id: (qty, cost)})로 영향받는 사용자만 갱신한다.
+    top(k) / rank(user_id)는 매 요청마다 전체를 다시 훑지 않고 정렬 리스트에서 바로 찾는다.
+    """
+
+    def __init__(self, load_positions, get_prices, max_age=30.0, clock=time.monotonic):
+        self._load_positions = load_positions
+        self._get_prices = get_prices
+        self.max_age = max_age
+        self._clock = clock
+        self._lock = threading.RLock()
+        self._refreshing = False
+        self.refreshed_at = None
+        self._reset()
+
+    def _reset(self):
+        self._order = []        # (-asset, user_id) 오름차순 = 자산 내림차순
+        self._assets = {}       # user_id -> asset
+        self._nicknames = {}
+        self._cash = {}
+        self._holdings = {}     # user_id -> {code: (qty, cost)}
+        self._holders = {}      # code -> {user_id: (qty, cost)}
+        self._prices = {}
+
+    # ---------- 조회 ----------
+    def __len__(self):
+        return len(self._order)
+
+    def top(self, k=10):
+        with self._lock:
+            return [{'user_id': uid, 'nickname': self._nicknames[uid], 'asset': -neg}
+                    for neg, uid in self._order[:k]]
+
+    def rank(self, user_id):
+        with self._lock:
+            asset = self._assets.get(user_id)
+            if asset is None:
+                return None
+            return bisect_left(self._order, (-asset, user_id)) + 1
+
+    def asset(self, user_id):
+        return self._assets.get(user_id)
+
+    # ---------- 갱신 ----------
+    def _set_asset(self, user_id, asset):
+        old = self._assets.get(user_id)
+        if old is not None:
+            idx = bisect_left(self._order, (-old, user_id))
+            del self._order[idx]
+        self._assets[user_id] = asset
+        insort(self._order, (-asset, user_id))
+
+    def _drop_user(self, user_id):
+        old = self._assets.pop(user_id, None)
+        if old is not None:
+            del self._order[bisect_left(self._order, (-old, user_id))]
+        for code in self._holdings.pop(user_id, {}):
+            self._holders.get(code, {}).pop(user_id, None)
+        self._nicknames.pop(user_id, None)
+        self._cash.pop(user_id, None)
+
+    @staticmethod
+    def _position_value(qty, cost, price):
+        return cost if price is None else qty * price
+
+    def _value(self, user_id):
+        return self._cash[user_id] + sum(
+            self._position_value(qty, cost, self._prices.get(code))
+            for code, (qty, cost) in self._holdings.get(user_id, {}).items())
+
+    def refresh(self):
+        users, holdings = self._load_positions()
+        codes = {code for h in holdings.values() for code in h}
+        prices = self._get_prices(codes) if codes else {}
+        with self._lock:
+            self._reset()
+            # 시세를 못 받은 종목(None)은 0원으로 치지 않고 빼 둠 (_value에서 매입금액으로 평가)
+            self._prices = {code: p for code, p in prices.items() if p is not None}
+            for uid, (nickname, cash) in users.items():
+                self._nicknames[uid] = nickname
+                self._cash[uid] = cash
+                self._holdings[uid] = dict(holdings.get(uid, {}))
+                for code, position in self._holdings[uid].items():
+                    self._holders.setdefault(code, {})[uid] = position
+            # 사용자별 dict 그대로 합산 (배열로 펼치는 비용 때문에 벡터 연산이 더 느림, bench_valuation 참고)
+            self._assets = {uid: self._value(uid) for uid in users}
+            self._order = sorted((-asset, uid) for uid, asset in self._assets.items())
+            self.refreshed_at = self._clock()
+
+    def reload_user(self, user_id):
+        # 주문 체결 직후 해당 사용자만 다시 읽어서 반영
+        users, holdings = self._load_positions(user_id)
+        with self._lock:
+            self._drop_user(user_id)
+            if user_id not in users:
+                return
+            nickname, cash = users[user_id]
+            self._nicknames[user_id] = nickname
+            self._cash[user_id] = cash
+            self._holdings[user_id] = dict(holdings.get(user_id, {}))
+            missing = [c for c in self._holdings[user_id] if c not in self._prices]
+        prices = self._get_prices(missing) if missing else {}
+        with self._lock:
+            self._prices.update((code, p) for code, p in prices.items() if p is not None)
+            for code, position in self._holdings[user_id].items():
+                self._holders.setdefault(code, {})[user_id] = position
+            self._set_asset(user_id, self._value(user_id))
+
+    def apply_prices(self, prices):
+        # 시세가 바뀐 종목을 보유한 사용자만 차액만큼 갱신
+        with self._lock:
+            deltas = {}
+            for code, price in prices.items():
+                old = self._prices.get(code)
+                if price is None or old == price:
+                    continue
+                self._prices[code] = price
+                for uid, (qty, cost) in self._holders.get(code, {}).items():
+                    deltas[uid] = deltas.get(uid, 0) + qty * price - self._position_value(qty, cost, old)
+            for uid, delta in deltas.items():
+                self._set_asset(uid, self._assets[uid] + delta)
+            return len(deltas)
+
+    def ensure_fresh(self):
+        # 처음에는 동기로 채우고, 이후에는 오래된 값을 보여주면서 백그라운드로 재계산
+        if self.refreshed_at is None:
+            with self._lock:
+                if self.refreshed_at is None:
+                    self.refresh()
+            return
+        if self._clock() - self.refreshed_at < self.max_age:
+            return
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+        threading.Thread(target=self._background_refresh, daemon=True).start()
+
+    def _background_refresh(self):
+        try:
+            self.refresh()
+        except Exception:
+            pass
+        finally:
+            self._refreshing = False
@@ -0,0 +1,133 @@
+import json
+import queue
+import threading
+import time
+
+
+# ==========================================
+# 실시간 시세 푸시 (Server-Sent Events)
+# ==========================================
+class Subscription:
+    def __init__(self, codes, user_id=None):
+        self.codes = set(codes)
+        self.user_id = user_id
+        self.queue = queue.Queue(maxsize=100)
+        self.last_rank = None
+        self.last_asset = None
+
+    def push(self, event, data):
+        try:
+            self.queue.put_nowait((event, data))
+        except queue.Full:
+            # 느린 클라이언트 때문에 발행 스레드가 막히지 않도록 오래된 메시지를 버림
+            try:
+                self.queue.get_nowait()
+            except queue.Empty:
+                pass
+            self.queue.put_nowait((event, data))
+
+
+class QuotePublisher:
+    """프로세스당 하나의 발행 스레드가 구독 중인 종목 시세를 주기적으로 읽고,
+    바뀐 값(시세, 총자산, 랭킹)만 각 구독자 큐에 넣는다.
+
+    - get_prices(codes) -> {code: price}
+    - leaderboard: 받은 시세를 apply_prices로 반영하고 top/rank/asset을 읽음 (없으면 시세만 보냄)
+    - interval: 발행 주기(초) 또는 주기를 돌려주는 함수 (장외에는 느리게)
+    - max_subscribers: 동시 구독 상한. 스트림 하나가 워커 스레드 하나를 계속 잡고 있으므로,
+      상한을 넘으면 subscribe()가 None을 돌려주고 일반 요청이 쓸 스레드를 남겨 둔다
+    서버 부하는 열린 탭 수가 아니라 구독 종목 수와 실제 변경 횟수에 비례한다.
+    """
+
+    def __init__(self, get_prices, leaderboard=None, interval=5.0, top_k=10, max_subscribers=None):
+        self._get_prices = get_prices
+        self.leaderboard = leaderboard
+        self.interval = interval
+        self.top_k = top_k
+        self.max_subscribers = max_subscribers
+        self._subs = set()
+        self._lock = threading.Lock()
+        self._prices = {}
+        self._top = None
+        self._thread = None
+
+    def subscribe(self, codes, user_id=None):
+        sub = Subscription(codes, user_id)
+        with self._lock:
+            if self.max_subscribers is not None and len(self._subs) >= self.max_subscribers:
+                return None
+            self._subs.add(sub)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop, name='quote-publisher', daemon=True)
+                self._thread.start()
+        return sub
+
+    def unsubscribe(self, sub):
+        with self._lock:
+            self._subs.discard(sub)
+
+    def __len__(self):
+        return len(self._subs)
+
+    def _loop(self):
+        while True:
+            started = time.monotonic()
+            try:
+                self.publish_once()
+            except Exception:
+                pass
+            interval = self.interval() if callable(self.interval) else self.interval
+            time.sleep(max(0.0, interval - (time.monotonic() - started)))
+
+    def publish_once(self):
+        with self._lock:
+            subs = list(self._subs)
+        if not subs:
+            return 0
+        codes = set().union(*(s.codes for s in subs))
+        prices = self._get_prices(codes) if codes else {}
+        # 조회 실패(None)는 변경으로 보지 않음 -> 0원 시세/랭킹이 클라이언트로 나가지 않게
+        changed = {c: p for c, p in prices.items() if p is not None and self._prices.get(c) != p}
+        self._prices.update(changed)
+
+        board = self.leaderboard
+        top = top_changed = None
+        if board is not None:
+            if changed:
+                board.apply_prices(changed)
+            top = board.top(self.top_k)
+            top_changed = top != self._top
+            self._top = top
+
+        pushed = 0
+        for sub in subs:
+            mine = {c: p for c, p in changed.items() if c in sub.codes}
+            if mine:
+                sub.push('quotes', mine)
+                pushed += 1
+            if board is None or sub.user_id is None:
+                continue
+            asset = board.asset(sub.user_id)
+            if asset != sub.last_asset:
+                sub.last_asset = asset
+                sub.push('portfolio', {'total_asset': asset})
+            rank = board.rank(sub.user_id)
+            if top_changed or rank != sub.last_rank:
+                sub.last_rank = rank
+                sub.push('ranking', {'top': top, 'my_rank': rank, 'total': len(board)})
+        return pushed
+
+
+def sse_stream(publisher, sub, heartbeat=15.0):
+    # text/event-stream 본문 생성기. 연결이 끊기면 GeneratorExit로 구독 해제
+    try:
+        yield 'retry: 5000\n\n'
+        while True:
+            try:
+                event, data = sub.queue.get(timeout=heartbeat)
+            except queue.Empty:
+                yield ': keep-alive\n\n'
+                continue
+            yield f'event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n'
+    finally:
+        publisher.unsubscribe(sub)
@@ -0,0 +1,134 @@
+import logging
+import os
+from datetime import date, datetime, time, timedelta, timezone
+
+log = logging.getLogger(__name__)
+
+
+# ==========================================
+# KRX 거래일/장 운영 시간 (KST)
+# ==========================================
+KST = timezone(timedelta(hours=9))
+SESSION_OPEN = time(9, 0)
+SESSION_CLOSE = time(15, 30)
+EOD_REFRESH = time(15, 45)      # 장 마감 후 종가/일봉을 한 번 더 받는 시각
+EOD_SETTLED = time(16, 0)       # 이 시각 이후로는 다음 개장 전까지 값이 바뀌지 않는다고 봄
+
+# 주말 외 휴장일은 데이터 파일(krx_holidays.txt, 다른 파일은 KRX_HOLIDAYS_FILE)에서 읽음.
+# 매년 KRX 공지에 맞춰 파일에 다음 해를 추가하고, 임시 휴장일은 KRX_HOLIDAYS=2026-07-17,2026-... 환경변수로 더함
+HOLIDAYS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'krx_holidays.txt')
+
+
+def parse_holidays(lines):
+    # 한 줄에 날짜 하나 또는 쉼표로 구분한 여러 개, '#' 뒤는 주석
+    days = set()
+    for line in lines:
+        line = line.split('#', 1)[0]
+        days.update(date.fromisoformat(d.strip()) for d in line.split(',') if d.strip())
+    return frozenset(days)
+
+
+def load_holidays(path=HOLIDAYS_FILE):
+    with open(path, encoding='utf-8') as f:
+        return parse_holidays(f)
+
+
+KRX_HOLIDAYS = load_holidays()
+
+
+def now_kst():
+    return datetime.now(KST)
+
+
+def holidays_from_env(value=None, path=None):
+    path = path or os.environ.get('KRX_HOLIDAYS_FILE')
+    value = os.environ.get('KRX_HOLIDAYS', '') if value is None else value
+    return (load_holidays(path) if path else KRX_HOLIDAYS) | parse_holidays([value])
+
+
+class MarketSchedule:
+    """장 운영 시간 기준으로 캐시 TTL과 백그라운드 갱신 주기를 정하는 스케줄러.
+
+    phase(): 'pre'(개장 전) / 'open'(장중) / 'post'(마감 후 종가 확정 전) / 'closed'(그 외, 휴장일)
+    - refresh_in(interval): 수집 주기. 장중에는 interval, 마감 후에는 EOD_REFRESH에 한 번,
+      그다음은 다음 개장까지 (휴장일에는 수집하지 않음)
+    - ttl(live_ttl): 장중/마감 직후에는 live_ttl, 그 외에는 다음 개장까지 (max_ttl 상한)
+    - epoch(live_ttl): 캐시 키에 섞는 값. 장중에는 live_ttl마다, 장외에는 다음 개장 때 바뀜
+    - status(poll): 클라이언트에 알려 줄 장 상태와 권장 폴링 주기
+    - 휴장일 달력에 한 번도 나오지 않는 해는 달력이 없는 것으로 보고 (해마다 한 번) 경고를 남김.
+      그 해에는 주말만 휴장으로 계산되므로 휴장일 파일을 갱신해야 함
+    """
+
+    def __init__(self, holidays=KRX_HOLIDAYS, max_ttl=1800.0, clock=now_kst):
+        self.holidays = holidays
+        self.max_ttl = max_ttl
+        self._clock = clock
+        self._years = {d.year for d in holidays}
+        self._warned = set()
+
+    def _now(self, now):
+        return (now or self._clock()).astimezone(KST)
+
+    def is_trading_day(self, day):
+        if day.year not in self._years and day.year not in self._warned:
+            self._warned.add(day.year)
+            log.warning('KRX 휴장일 달력에 %d년이 없음: 주말만 휴장으로 계산합니다 '
+                        '(krx_holidays.txt 또는 KRX_HOLIDAYS_FILE 갱신 필요)', day.year)
+        return day.weekday() < 5 and day not in self.holidays
+
+    def phase(self, now=None):
+        now = self._now(now)
+        if not self.is_trading_day(now.date()):
+            return 'closed'
+        t = now.time()
+        if t < SESSION_OPEN:
+            return 'pre'
+        if t < SESSION_CLOSE:
+            return 'open'
+        return 'post' if t < EOD_SETTLED else 'closed'
+
+    def is_open(self, now=None):
+        return self.phase(now) == 'open'
+
+    def next_open(self, now=None):
+        now = self._now(now)
+        day = now.date() if now.time() < SESSION_OPEN else now.date() + timedelta(days=1)
+        for _ in range(366):
+            if self.is_trading_day(day):
+                return datetime.combine(day, SESSION_OPEN, KST)
+            day += timedelta(days=1)
+        raise ValueError('no trading day within a year')
+
+    def _until(self, when, now):
+        return max(0.0, (when - now).total_seconds())
+
+    def refresh_in(self, interval, now=None):
+        now = self._now(now)
+        phase = self.phase(now)
+        if phase == 'open':
+            return interval
+        if phase == 'post' and now.time() < EOD_REFRESH:
+            return self._until(datetime.combine(now.date(), EOD_REFRESH, KST), now)
+        return self._until(self.next_open(now), now)
+
+    def ttl(self, live_ttl, max_ttl=None, now=None):
+        now = self._now(now)
+        if self.phase(now) in ('open', 'post'):
+            return live_ttl
+        until_open = self._until(self.next_open(now), now)
+        return max(live_ttl, min(until_open, max_ttl or self.max_ttl))
+
+    def epoch(self, live_ttl, now=None):
+        now = self._now(now)
+        if self.phase(now) in ('open', 'post'):
+            return ('live', int(now.timestamp() // live_ttl))
+        return ('closed', self.next_open(now).date())
+
+    def status(self, poll, now=None):
+        now = self._now(now)
+        return {
+            'phase': self.phase(now),
+            'is_open': self.is_open(now),
+            'next_open': self.next_open(now).isoformat(),
+            'poll_interval': int(self.ttl(poll, now=now)),
+        }
@@ -0,0 +1,313 @@
+import os
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import nullcontext
+from datetime import date, datetime, timedelta
+
+
+# ==========================================
+# 로컬 시세 저장소 (SQLite)
+# ==========================================
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS listing (
+    code TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    market TEXT,
+    close REAL,
+    changes_ratio REAL,
+    marcap REAL,
+    volume REAL,
+    updated_at REAL
+);
+CREATE INDEX IF NOT EXISTS ix_listing_market_marcap ON listing (market, marcap DESC);
+CREATE TABLE IF NOT EXISTS prices (
+    code TEXT NOT NULL,
+    date TEXT NOT NULL,
+    open REAL, high REAL, low REAL, close REAL, volume REAL,
+    PRIMARY KEY (code, date)
+) WITHOUT ROWID;
+"""
+
+
+class MarketStore:
+    """종목 목록과 일별 OHLCV를 보관하는 로컬 저장소.
+
+    요청 처리 코드는 여기서만 읽고, 네트워크 조회는 MarketIngestor만 한다.
+    """
+
+    def __init__(self, path='market.db'):
+        self.path = path
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        self._conn().executescript(SCHEMA)
+
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    # ---------- 쓰기 (수집기 전용) ----------
+    def upsert_listing(self, df):
+        now = time.time()
+        rows = [(r.Code, r.Name, getattr(r, 'Market', None), _num(r.Close), _num(r.ChagesRatio),
+                 _num(r.Marcap), _num(getattr(r, 'Volume', None)), now)
+                for r in df.itertuples(index=False)]
+        with self._write_lock, self._conn() as conn:
+            conn.executemany('INSERT OR REPLACE INTO listing VALUES (?, ?, ?, ?, ?, ?, ?, ?)', rows)
+        return len(rows)
+
+    def upsert_history(self, code, df):
+        rows = [(code, idx.strftime('%Y-%m-%d'), _num(r.Open), _num(r.High), _num(r.Low),
+                 _num(r.Close), _num(r.Volume))
+                for idx, r in zip(df.index, df.itertuples(index=False))]
+        with self._write_lock, self._conn() as conn:
+            conn.executemany('INSERT OR REPLACE INTO prices VALUES (?, ?, ?, ?, ?, ?, ?)', rows)
+        return len(rows)
+
+    # ---------- 읽기 ----------
+    def names(self):
+        return dict(self._conn().execute('SELECT code, name FROM listing'))
+
+    def listing(self, market=None, limit=None):
+        sql = 'SELECT code, name, marcap, close, changes_ratio, volume FROM listing'
+        args = []
+        if market:
+            sql += ' WHERE market = ?'
+            args.append(market)
+        sql += ' ORDER BY marcap DESC'
+        if limit:
+            sql += ' LIMIT ?'
+            args.append(limit)
+        return [{'Code': c, 'Name': n, 'Marcap': m, 'Close': cl, 'ChagesRatio': cr, 'Volume': v}
+                for c, n, m, cl, cr, v in self._conn().execute(sql, args)]
+
+    def listing_updated_at(self):
+        return self._conn().execute('SELECT MAX(updated_at) FROM listing').fetchone()[0]
+
+    def listing_closes(self):
+        return {code: int(close) for code, close in
+                self._conn().execute('SELECT code, close FROM listing WHERE close IS NOT NULL')}
+
+    def latest_close(self, code):
+        # 목록(장중 갱신) 가격을 우선, 없으면 일봉의 마지막 종가
+        row = self._conn().execute('SELECT close FROM listing WHERE code = ?', (code,)).fetchone()
+        if row is None or row[0] is None:
+            row = self._conn().execute(
+                'SELECT close FROM prices WHERE code = ? ORDER BY date DESC LIMIT 1', (code,)).fetchone()
+        return None if row is None or row[0] is None else int(row[0])
+
+    def last_date(self, code):
+        row = self._conn().execute('SELECT MAX(date) FROM prices WHERE code = ?', (code,)).fetchone()
+        return date.fromisoformat(row[0]) if row and row[0] else None
+
+    def history(self, code, start):
+        return self._conn().execute(
+            'SELECT date, close FROM prices WHERE code = ? AND date >= ? ORDER BY date',
+            (code, start.strftime('%Y-%m-%d'))).fetchall()
+
+
+class ListingNames:
+    """종목코드 -> 종목명 (dict처럼 사용).
+
+    기동 시 로컬 저장소의 마지막 스냅샷을 바로 읽고(네트워크 대기 없음), 이후에는
+    max_age마다 저장소의 listing 갱신 시각만 확인해서 바뀌었을 때만 다시 읽는다.
+    """
+
+    def __init__(self, store, max_age=60.0, clock=time.monotonic):
+        self.store = store
+        self.max_age = max_age
+        self._clock = clock
+        self._names = {}
+        self.version = None
+        self._checked_at = None
+        self._lock = threading.Lock()
+        self.reload()
+
+    def reload(self):
+        version = self.store.listing_updated_at()
+        if version != self.version:
+            self._names = self.store.names()
+            self.version = version
+        self._checked_at = self._clock()
+
+    def maybe_reload(self):
+        if self._clock() - self._checked_at >= self.max_age and self._lock.acquire(blocking=False):
+            try:
+                self.reload()
+            finally:
+                self._lock.release()
+
+    def get(self, code, default=None):
+        self.maybe_reload()
+        return self._names.get(code, default)
+
+    def items(self):
+        self.maybe_reload()
+        return self._names.items()
+
+    def __contains__(self, code):
+        self.maybe_reload()
+        return code in self._names
+
+    def __len__(self):
+        return len(self._names)
+
+
+def _num(value):
+    try:
+        return None if value is None or value != value else float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+# ==========================================
+# 백그라운드 시세 수집기
+# ==========================================
+class MarketIngestor:
+    """StockListing('KRX')와 관심 종목 일봉을 주기적으로 받아 MarketStore에 저장.
+
+    - tracked_codes(): 보유 종목 등 계속 갱신할 종목 코드 목록
+    - 일봉은 저장된 마지막 날짜부터만 받음 (장중에는 당일 봉이 바뀌므로 마지막 날짜 포함)
+    - request(code): 저장소에 없는 종목을 수집 스레드에 요청하고 잠깐 기다림
+    - lock_path가 있으면 파일 잠금을 잡은 프로세스 하나만 주기 수집을 함
+      (gunicorn 워커 여러 개가 같은 저장소를 중복으로 갱신하지 않도록)
+    - span(name): 외부 조회 시간을 재는 컨텍스트 매니저 (metrics.span)
+    - interval: 수집 주기(초) 또는 매번 주기를 돌려주는 함수 (장중/장외 주기 조절)
+    - 어느 단계에서 예외가 나도 수집 스레드는 죽지 않음 (last_error에 기록, 주기 유지)
+    """
+
+    def __init__(self, store, fdr=None, tracked_codes=lambda: (), interval=60.0,
+                 history_days=365, top_n=30, lock_path=None, on_listing=None, span=None, retry_interval=60.0):
+        self.store = store
+        self._fdr = fdr
+        self.tracked_codes = tracked_codes
+        self.interval = interval
+        self.retry_interval = retry_interval
+        self.history_days = history_days
+        self.top_n = top_n
+        self._requests = queue.Queue()
+        self._pending = {}
+        self._pending_lock = threading.Lock()
+        self._thread = None
+        self.lock_path = lock_path
+        self.on_listing = on_listing
+        self.span = span or (lambda name: nullcontext())
+        self._lock_file = None
+        self.last_run = None
+        self.last_error = None
+
+    @property
+    def fdr(self):
+        # FinanceDataReader는 import만 0.4초 이상 걸리므로 처음 수집할 때 불러옴
+        if self._fdr is None:
+            import FinanceDataReader
+            self._fdr = FinanceDataReader
+        return self._fdr
+
+    def refresh_listing(self):
+        with self.span('fdr_listing'):
+            df = self.fdr.StockListing('KRX')
+        count = self.store.upsert_listing(df)
+        if self.on_listing is not None:
+            self.on_listing()
+        return count
+
+    def refresh_history(self, code, today=None):
+        today = today or date.today()
+        last = self.store.last_date(code)
+        start = last if last else today - timedelta(days=self.history_days)
+        with self.span('fdr_history'):
+            df = self.fdr.DataReader(code, datetime.combine(start, datetime.min.time()))
+        return self.store.upsert_history(code, df) if len(df) else 0
+
+    def run_once(self):
+        try:
+            self.refresh_listing()
+        except Exception as e:
+            self.last_error = e
+        codes = set()
+        try:
+            codes.update(self.tracked_codes())
+        except Exception as e:
+            self.last_error = e
+        try:
+            codes.update(r['Code'] for r in self.store.listing('KOSPI', self.top_n))
+        except Exception as e:
+            self.last_error = e
+        for code in sorted(codes):
+            self._ingest(code)
+        self.last_run = time.time()
+
+    def _ingest(self, code):
+        try:
+            self.refresh_history(code)
+        except Exception as e:
+            self.last_error = e
+        finally:
+            with self._pending_lock:
+                event = self._pending.pop(code, None)
+            if event is not None:
+                event.set()
+
+    def request(self, code, timeout=3.0):
+        # 수집 스레드가 없으면(테스트/단발 실행) 직접 받아옴
+        if self._thread is None:
+            self._ingest(code)
+            return True
+        with self._pending_lock:
+            event = self._pending.get(code)
+            if event is None:
+                event = self._pending[code] = threading.Event()
+                self._requests.put(code)
+        return event.wait(timeout)
+
+    def _try_lead(self):
+        if self.lock_path is None or self._lock_file is not None:
+            return True
+        import fcntl  # 리눅스 컨테이너에서만 lock_path를 씀
+        f = open(self.lock_path, 'a')
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            f.close()
+            return False
+        f.write(f'{os.getpid()}\n')
+        f.flush()
+        self._lock_file = f
+        return True
+
+    def _loop(self):
+        next_run = 0.0
+        while True:
+            wait = max(0.0, next_run - time.monotonic())
+            try:
+                code = self._requests.get(timeout=wait)
+            except queue.Empty:
+                # 잠금을 못 잡은 프로세스는 요청받은 종목만 처리하고, 주기마다 다시 시도
+                try:
+                    if self._try_lead():
+                        self.run_once()
+                except Exception as e:
+                    self.last_error = e
+                try:
+                    delay = self.next_interval()
+                except Exception as e:
+                    self.last_error, delay = e, self.retry_interval
+                next_run = time.monotonic() + delay
+            else:
+                self._ingest(code)
+
+    def next_interval(self):
+        return self.interval() if callable(self.interval) else self.interval
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._loop, name='market-ingestor', daemon=True)
+            self._thread.start()
+        return self._thread
@@ -0,0 +1,300 @@
+import glob
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+
+# ==========================================
+# 요청 계측 (구간별 시간 + Prometheus 텍스트 노출)
+# ==========================================
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+
+class Histogram:
+    def __init__(self, name, help_text, labels, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self._series = {}   # 라벨 값 튜플 -> [버킷별 개수..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value, *label_values):
+        with self._lock:
+            row = self._series.get(label_values)
+            if row is None:
+                row = self._series[label_values] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    row[i] += 1
+            row[-2] += value
+            row[-1] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {json.dumps(k): list(v) for k, v in self._series.items()}
+
+    def render(self, series):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} histogram']
+        for key, row in sorted(series.items()):
+            pairs = [(label, value) for label, value in zip(self.labels, json.loads(key))]
+            for bound, count in zip(self.buckets, row):
+                lines.append(f'{self.name}_bucket{_labels(pairs + [("le", bound)])} {count}')
+            lines.append(f'{self.name}_bucket{_labels(pairs + [("le", "+Inf")])} {row[-1]}')
+            lines.append(f'{self.name}_sum{_labels(pairs)} {row[-2]:.6f}')
+            lines.append(f'{self.name}_count{_labels(pairs)} {row[-1]}')
+        return lines
+
+
+class Value:
+    # 다른 객체가 이미 세고 있는 값(예: 시세 캐시 통계)을 스크레이프/내보내기 때마다 읽어서
+    # counter 또는 gauge 하나로 노출. 워커가 여러 개면 히스토그램처럼 합산됨
+    def __init__(self, name, help_text, kind, read):
+        self.name = name
+        self.help = help_text
+        self.kind = kind
+        self.read = read
+
+    def snapshot(self):
+        return {json.dumps(()): [float(self.read())]}
+
+    def render(self, series):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} {self.kind}']
+        for row in series.values():
+            lines.append(f'{self.name} {row[0]:g}')
+        return lines
+
+
+class Registry:
+    """워커 프로세스 하나의 지표(히스토그램, counter/gauge) 모음.
+
+    gunicorn 워커가 여러 개면 각자 export_dir에 스냅샷을 쓰고, /metrics는 전부 합쳐서 보여준다
+    (스크레이프가 어느 워커로 가든 같은 합계가 나오도록).
+    """
+
+    def __init__(self, export_dir=None, export_interval=5.0):
+        self._metrics = {}
+        self.export_dir = export_dir
+        self.export_interval = export_interval
+        self._exported_at = 0.0
+        if export_dir:
+            os.makedirs(export_dir, exist_ok=True)
+
+    def histogram(self, name, help_text, labels, buckets=LATENCY_BUCKETS):
+        self._metrics[name] = Histogram(name, help_text, labels, buckets)
+        return self._metrics[name]
+
+    def value(self, name, help_text, kind, read):
+        # read() -> 현재 값 (kind: 'counter' / 'gauge')
+        self._metrics[name] = Value(name, help_text, kind, read)
+        return self._metrics[name]
+
+    def _path(self, pid=None):
+        return os.path.join(self.export_dir, f'{pid or os.getpid()}.json')
+
+    def maybe_export(self, force=False):
+        if not self.export_dir or (not force and time.monotonic() - self._exported_at < self.export_interval):
+            return
+        self._exported_at = time.monotonic()
+        tmp = self._path() + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump({name: m.snapshot() for name, m in self._metrics.items()}, f)
+        os.replace(tmp, self._path())
+
+    def collect(self):
+        # 이 워커 값 + (있으면) 다른 워커들이 내보낸 값
+        if not self.export_dir:
+            return {name: m.snapshot() for name, m in self._metrics.items()}
+        self.maybe_export(force=True)
+        merged = {}
+        for path in glob.glob(os.path.join(self.export_dir, '*.json')):
+            try:
+                with open(path) as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                continue
+            for name, series in data.items():
+                target = merged.setdefault(name, {})
+                for key, row in series.items():
+                    if key in target:
+                        target[key] = [a + b for a, b in zip(target[key], row)]
+                    else:
+                        target[key] = list(row)
+        return merged
+
+    def render(self):
+        lines = []
+        data = self.collect()
+        for name, metric in self._metrics.items():
+            lines.extend(metric.render(data.get(name, {})))
+        return '\n'.join(lines) + '\n'
+
+
+def _labels(pairs):
+    escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, v in pairs)
+    return '{' + ','.join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + '}'
+
+
+# ---------- 요청 단위 구간 기록 ----------
+_local = threading.local()
+
+
+class RequestTimer:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.spans = {}     # 이름 -> [횟수, 초]
+
+    def add(self, name, seconds):
+        span = self.spans.setdefault(name, [0, 0.0])
+        span[0] += 1
+        span[1] += seconds
+
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    def server_timing(self):
+        # Server-Timing: db;desc="3 queries";dur=1.2, render;dur=0.8, total;dur=5.1 (ms)
+        parts = [f'{name};desc="{count}x";dur={seconds * 1000:.1f}'
+                 for name, (count, seconds) in self.spans.items()]
+        parts.append(f'total;dur={self.elapsed() * 1000:.1f}')
+        return ', '.join(parts)
+
+
+def start_request():
+    _local.timer = RequestTimer()
+    return _local.timer
+
+
+def current():
+    return getattr(_local, 'timer', None)
+
+
+def end_request():
+    timer = current()
+    _local.timer = None
+    return timer
+
+
+span_hook = None   # (name, seconds) -> None, 앱에서 전역 히스토그램 기록용으로 설정
+
+
+def record(name, seconds):
+    # 요청 처리 스레드에서 불렸을 때만 그 요청의 구간에 더함 (백그라운드 스레드는 전역 히스토그램만)
+    timer = current()
+    if timer is not None:
+        timer.add(name, seconds)
+    if span_hook is not None:
+        span_hook(name, seconds)
+
+
+@contextmanager
+def span(name):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, time.perf_counter() - start)
+
+
+# ==========================================
+# Flask / SQLAlchemy 연결
+# ==========================================
+class RequestMetrics:
+    """요청마다 구간(db, render, fdr_*, ...) 시간을 모아 Server-Timing 헤더로 돌려주고,
+    라우트별 지연 히스토그램을 /metrics (Prometheus 텍스트 형식)로 노출한다.
+    """
+
+    def __init__(self, app=None, export_dir=None):
+        self.registry = Registry(export_dir)
+        self.latency = self.registry.histogram(
+            'http_request_duration_seconds', '요청 처리 시간', ('route', 'method', 'status'))
+        self.spans = self.registry.histogram(
+            'http_request_span_seconds', '요청 1건 안에서 구간별로 쓴 시간 합계', ('route', 'span'))
+        self.queries = self.registry.histogram(
+            'http_request_db_queries', '요청 1건의 DB 쿼리 수', ('route',), COUNT_BUCKETS)
+        self.upstream = self.registry.histogram(
+            'upstream_call_seconds', '외부 시세 조회 시간 (백그라운드 수집 포함)', ('call',))
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        from flask import request, template_rendered, before_render_template
+
+        global span_hook
+        span_hook = self._on_span
+        instrument_sqlalchemy()
+        before_render_template.connect(self._render_started, app)
+        template_rendered.connect(self._render_finished, app)
+
+        @app.before_request
+        def _start_timer():
+            start_request()
+
+        @app.after_request
+        def _finish_timer(response):
+            timer = current()
+            if timer is None:
+                return response
+            route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+            self.latency.observe(timer.elapsed(), route, request.method, str(response.status_code))
+            for name, (_, seconds) in timer.spans.items():
+                self.spans.observe(seconds, route, name)
+            self.queries.observe(timer.spans.get('db', (0, 0.0))[0], route)
+            response.headers['Server-Timing'] = timer.server_timing()
+            self.registry.maybe_export()
+            return response
+
+        @app.teardown_request
+        def _clear_timer(_exc):
+            end_request()
+
+        app.add_url_rule('/metrics', 'metrics', self.metrics_view)
+
+    def metrics_view(self):
+        from flask import Response
+        return Response(self.registry.render(), mimetype='text/plain; version=0.0.4')
+
+    def _on_span(self, name, seconds):
+        if name.startswith('fdr'):
+            self.upstream.observe(seconds, name)
+
+    @staticmethod
+    def _render_started(_app, template, context, **_):
+        _local.render_started = time.perf_counter()
+
+    @staticmethod
+    def _render_finished(_app, template, context, **_):
+        started = getattr(_local, 'render_started', None)
+        if started is not None:
+            _local.render_started = None
+            record('render', time.perf_counter() - started)
+
+
+_sqlalchemy_instrumented = False
+
+
+def instrument_sqlalchemy():
+    # 모든 Engine의 쿼리 실행 시간을 'db' 구간으로 기록
+    global _sqlalchemy_instrumented
+    if _sqlalchemy_instrumented:
+        return
+    _sqlalchemy_instrumented = True
+    from sqlalchemy import event
+    from sqlalchemy.engine import Engine
+
+    @event.listens_for(Engine, 'before_cursor_execute')
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('query_started', []).append(time.perf_counter())
+
+    @event.listens_for(Engine, 'after_cursor_execute')
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        record('db', time.perf_counter() - conn.info['query_started'].pop())
+
+    @event.listens_for(Engine, 'handle_error')
+    def _error(context):
+        started = context.connection.info.get('query_started') if context.connection is not None else None
+        if started:
+            started.pop()
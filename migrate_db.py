@@ -0,0 +1,77 @@
+"""DB 이전 스크립트 (예: 컨테이너 안의 SQLite -> Postgres).
+
+대상 DB에 models.py 스키마(인덱스/제약 포함)를 만들고, 외래키 순서대로 테이블을 복사한다.
+Postgres로 옮기면 id 시퀀스를 복사한 최대값 다음부터 이어지도록 맞춘다.
+
+    python migrate_db.py sqlite:///instance/stock.db postgresql://user:pw@db:5432/trader
+    python migrate_db.py --replace SRC DST     # 대상 테이블을 비우고 다시 복사
+"""
+import argparse
+import sys
+
+from sqlalchemy import create_engine, func, inspect, select, text
+
+from models import db, normalize_db_url
+
+BATCH = 5000
+
+
+def copy_table(src, dst, table):
+    copied = 0
+    with src.connect() as s, dst.begin() as d:
+        result = s.execution_options(stream_results=True).execute(select(table))
+        while True:
+            rows = result.fetchmany(BATCH)
+            if not rows:
+                break
+            d.execute(table.insert(), [dict(r._mapping) for r in rows])
+            copied += len(rows)
+    return copied
+
+
+def reset_sequences(dst, table):
+    if dst.dialect.name != 'postgresql':
+        return
+    for col in table.primary_key.columns:
+        if col.autoincrement is not False and col.type.python_type is int:
+            with dst.begin() as d:
+                d.execute(text(f"SELECT setval(pg_get_serial_sequence('\"{table.name}\"', '{col.name}'), "
+                               f"COALESCE((SELECT MAX(\"{col.name}\") FROM \"{table.name}\"), 0) + 1, false)"))
+
+
+def migrate(src_url, dst_url, replace=False, log=print):
+    src = create_engine(normalize_db_url(src_url))
+    dst = create_engine(normalize_db_url(dst_url))
+    tables = db.metadata.sorted_tables
+    db.metadata.create_all(dst)
+    with dst.connect() as d:
+        not_empty = [t.name for t in tables if d.execute(select(func.count()).select_from(t)).scalar()]
+    if not_empty and not replace:
+        raise SystemExit(f'대상 DB에 이미 데이터가 있습니다: {", ".join(not_empty)} (--replace 로 덮어쓰기)')
+    if replace:
+        with dst.begin() as d:
+            for table in reversed(tables):
+                d.execute(table.delete())
+
+    counts = {}
+    existing = set(inspect(src).get_table_names())
+    for table in tables:
+        # 예전 버전 DB에는 없는 테이블(주문 키, 체결 원장 등)은 건너뜀
+        counts[table.name] = copy_table(src, dst, table) if table.name in existing else 0
+        reset_sequences(dst, table)
+        log(f'  {table.name}: {counts[table.name]} rows')
+    return counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='models.py 테이블을 다른 DB로 복사')
+    parser.add_argument('source')
+    parser.add_argument('target')
+    parser.add_argument('--replace', action='store_true', help='대상 테이블을 비운 뒤 복사')
+    args = parser.parse_args(argv)
+    print(f'{args.source} -> {args.target}')
+    migrate(args.source, args.target, replace=args.replace)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
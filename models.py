@@ -0,0 +1,150 @@
+import sqlite3
+from contextlib import contextmanager
+from datetime import datetime
+
+from flask_sqlalchemy import SQLAlchemy
+from flask_login import UserMixin
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+db = SQLAlchemy()
+
+# SQLite 연결마다 적용할 PRAGMA (WAL: 읽기가 쓰기를 기다리지 않음, 쓰기는 여전히 한 번에 하나)
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'foreign_keys': 'ON',
+    'busy_timeout': '30000',
+}
+
+
+def normalize_db_url(url):
+    # Heroku/일부 PaaS가 주는 postgres:// 는 SQLAlchemy 2.x에서 인식하지 않음
+    if url.startswith('postgres://'):
+        return 'postgresql://' + url[len('postgres://'):]
+    return url
+
+
+@event.listens_for(Engine, 'connect')
+def _sqlite_pragmas(dbapi_conn, _record):
+    if not isinstance(dbapi_conn, sqlite3.Connection):
+        return
+    cursor = dbapi_conn.cursor()
+    for name, value in SQLITE_PRAGMAS.items():
+        cursor.execute(f'PRAGMA {name}={value}')
+    cursor.close()
+
+# ==========================================
+# DB 모델
+# ==========================================
+class User(UserMixin, db.Model):
+    __table_args__ = (db.CheckConstraint('cash >= 0', name='ck_user_cash'),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    username = db.Column(db.String(100), unique=True, nullable=False)
+    password_hash = db.Column(db.String(200), nullable=False)
+    nickname = db.Column(db.String(100), nullable=False)
+    cash = db.Column(db.Float, nullable=False, default=1000000.0)
+    stocks = db.relationship('Stock', backref='owner', lazy=True)
+
+class Stock(db.Model):
+    # (user_id, code) 유니크 인덱스: 한 사용자가 같은 종목을 두 줄로 갖지 않게 하고,
+    # user_id로 시작하므로 u.stocks / filter_by(user_id=...) 조회도 이 인덱스를 씀
+    __table_args__ = (
+        db.Index('uq_stock_user_code', 'user_id', 'code', unique=True),
+        db.Index('ix_stock_code', 'code'),   # 보유 종목 목록(수집 대상), 종목별 보유자 조회
+        db.CheckConstraint('quantity >= 0', name='ck_stock_quantity'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    code = db.Column(db.String(20), nullable=False)
+    name = db.Column(db.String(100), default="Unknown")
+    quantity = db.Column(db.Integer, nullable=False, default=0)
+    avg_price = db.Column(db.Float, nullable=False, default=0.0)
+
+class OrderRequest(db.Model):
+    # 주문 폼 재전송/더블클릭 방지용 멱등성 키 (결과도 같이 저장해서 재전송 시 그대로 돌려줌)
+    # 키는 사용자별: 서로 다른 사용자가 같은 client_order_id를 써도 충돌하지 않음
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    key = db.Column(db.String(64), primary_key=True)
+    ok = db.Column(db.Boolean, nullable=False, default=False)
+    message = db.Column(db.String(200))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+class Trade(db.Model):
+    # 체결 원장 (추가만 함). 포지션 재구성/감사용
+    __table_args__ = (
+        db.Index('ix_trade_user_ts', 'user_id', 'ts'),
+        db.CheckConstraint('quantity > 0', name='ck_trade_quantity'),
+        db.CheckConstraint("side IN ('buy', 'sell')", name='ck_trade_side'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    code = db.Column(db.String(20), nullable=False)
+    name = db.Column(db.String(100))
+    side = db.Column(db.String(4), nullable=False)
+    quantity = db.Column(db.Integer, nullable=False)
+    price = db.Column(db.Float, nullable=False)
+    ts = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+
+@contextmanager
+def _file_lock(path):
+    if path is None:
+        yield
+        return
+    import fcntl  # 리눅스 컨테이너에서만 lock_path를 씀
+    with open(path, 'a') as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def init_db(lock_path=None):
+    # gunicorn 워커들이 동시에 import 해도 스키마 생성은 한 프로세스씩 (lock_path 파일 잠금).
+    # 잠금 없이 동시에 create_all 하면 'table ... already exists'로 워커가 기동에 실패하고 서버 전체가 내려감
+    with _file_lock(lock_path):
+        _init_db()
+
+
+def _upgrade_order_request():
+    # 예전 스키마(key 단독 기본키)면 (user_id, key) 기본키로 다시 만듦. 멱등성 기록뿐이라 행을 옮겨 담아 재생성
+    table = OrderRequest.__table__
+    insp = db.inspect(db.engine)
+    if not insp.has_table(table.name):
+        return
+    if insp.get_pk_constraint(table.name)['constrained_columns'] != ['key']:
+        return
+    rows = [dict(r._mapping) for r in db.session.execute(db.select(table))]
+    db.session.commit()
+    table.drop(db.engine)
+    table.create(db.engine)
+    if rows:
+        db.session.execute(table.insert(), rows)
+    db.session.commit()
+
+
+def _init_db():
+    _upgrade_order_request()
+    # create_all은 기존 테이블에 인덱스를 추가하지 않으므로, 중복 보유 행을 합친 뒤 유니크 인덱스를 만든다
+    # (CHECK 제약은 새로 만드는 테이블에만 들어감. 기존 SQLite 파일은 migrate_db.py로 새 DB에 옮기면 적용)
+    db.create_all()
+    dupes = db.session.query(Stock.user_id, Stock.code).group_by(Stock.user_id, Stock.code) \
+        .having(db.func.count(Stock.id) > 1).all()
+    for user_id, code in dupes:
+        rows = Stock.query.filter_by(user_id=user_id, code=code).order_by(Stock.id).all()
+        keep = rows[0]
+        total_qty = sum(r.quantity for r in rows)
+        if total_qty:
+            keep.avg_price = sum(r.quantity * r.avg_price for r in rows) / total_qty
+        keep.quantity = total_qty
+        for r in rows[1:]:
+            db.session.delete(r)
+    db.session.commit()
+    for table in db.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(db.engine, checkfirst=True)
@@ -0,0 +1,225 @@
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait
+
+
+# ==========================================
+# 프로세스 공용 시세 캐시 (TTL + LRU + 요청 합치기)
+# ==========================================
+class _Entry:
+    __slots__ = ('value', 'ok', 'expires_at')
+
+    def __init__(self, value, ok, expires_at):
+        self.value = value
+        self.ok = ok
+        self.expires_at = expires_at
+
+
+class QuoteCache:
+    """종목코드 -> 현재가 캐시.
+
+    - 항목별 TTL, 최대 크기를 넘으면 가장 오래 안 쓴 항목부터 제거(LRU)
+    - 같은 코드에 대한 동시 미스는 한 번의 upstream 조회로 합침
+    - 조회 실패는 짧은 TTL로 따로 캐싱 (잘못된 코드가 매 페이지마다 재조회되지 않도록)
+    - get_many()는 여러 코드를 한 번에 조회: 미스는 제한된 스레드 풀에서 병렬로,
+      미스가 많으면 bulk_fetch(전체 시세 스냅샷) 한 번으로 대체
+    - shared(shared_cache 백엔드)가 있으면 로컬 미스 시 다른 워커가 받아 둔 값을 먼저 확인
+    - ttl은 초 또는 저장할 때마다 TTL을 돌려주는 함수 (장외에는 길게)
+    - 조회 실패/시간 초과 시 마지막으로 성공한 값이 있으면 그 값을, 한 번도 없었으면 default를 돌려줌
+    - stats(): 적중/미스/실패/조회 시간 누적값 (app.py에서 /metrics로 노출)
+    """
+
+    def __init__(self, fetch, maxsize=1024, ttl=30.0, error_ttl=5.0, clock=time.monotonic,
+                 bulk_fetch=None, bulk_threshold=8, max_workers=8, timeout=5.0, shared=None):
+        self._fetch = fetch
+        self._shared = shared
+        self._bulk_fetch = bulk_fetch
+        self.bulk_threshold = bulk_threshold
+        self.timeout = timeout
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='quote')
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.error_ttl = error_ttl
+        self._clock = clock
+        self._data = OrderedDict()
+        self._last_good = OrderedDict()
+        self._lock = threading.Lock()
+        self._inflight = {}
+        self._stats = {'hits': 0, 'misses': 0, 'errors': 0, 'coalesced': 0, 'shared_hits': 0,
+                       'evictions': 0, 'fetches': 0, 'fetch_seconds': 0.0, 'stale': 0}
+
+    # ---------- 공유 캐시 (실패해도 로컬 캐시만으로 동작) ----------
+    def _shared_get(self, codes):
+        if self._shared is None or not codes:
+            return {}
+        try:
+            found = self._shared.get_many('quote:' + c for c in codes)
+        except Exception:
+            return {}
+        return {key[6:]: tuple(v) for key, v in found.items()}
+
+    def _shared_set(self, items, ok=True):
+        if self._shared is None or not items:
+            return
+        try:
+            self._shared.set_many({'quote:' + c: [ok, v] for c, v in items.items()},
+                                  self._ttl() if ok else self.error_ttl)
+        except Exception:
+            pass
+
+    def _lookup(self, code, now):
+        entry = self._data.get(code)
+        if entry is None:
+            return None
+        if entry.expires_at <= now:
+            del self._data[code]
+            return None
+        self._data.move_to_end(code)
+        return entry
+
+    def _ttl(self):
+        return self.ttl() if callable(self.ttl) else self.ttl
+
+    def _store(self, code, value, ok):
+        ttl = self._ttl() if ok else self.error_ttl
+        self._data[code] = _Entry(value, ok, self._clock() + ttl)
+        self._data.move_to_end(code)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self._stats['evictions'] += 1
+        if ok:
+            self._last_good[code] = value
+            self._last_good.move_to_end(code)
+            while len(self._last_good) > self.maxsize:
+                self._last_good.popitem(last=False)
+
+    def _fallback(self, code, default):
+        # 실패한 종목은 0/default 대신 마지막으로 받은 시세 (없으면 default)
+        value = self._last_good.get(code)
+        if value is None:
+            return default
+        self._stats['stale'] += 1
+        return value
+
+    def get(self, code, default=0):
+        with self._lock:
+            entry = self._lookup(code, self._clock())
+            if entry is not None:
+                self._stats['hits'] += 1
+                return entry.value if entry.ok else self._fallback(code, default)
+            self._stats['misses'] += 1
+            waiter = self._inflight.get(code)
+            leader = waiter is None
+            if leader:
+                waiter = self._inflight[code] = threading.Event()
+            else:
+                self._stats['coalesced'] += 1
+
+        if not leader:
+            # 다른 스레드가 이미 조회 중이면 그 결과를 기다렸다가 재사용 (최대 timeout까지만)
+            waiter.wait(self.timeout)
+            with self._lock:
+                entry = self._data.get(code)
+                if entry is None or not entry.ok:
+                    return self._fallback(code, default)
+            return entry.value
+
+        try:
+            shared = self._shared_get([code]).get(code)
+            if shared is not None:
+                ok, value = shared
+                with self._lock:
+                    self._stats['shared_hits'] += 1
+                    self._store(code, value, ok)
+                    return value if ok else self._fallback(code, default)
+
+            started = time.perf_counter()
+            try:
+                value, ok = self._fetch(code), True
+            except Exception:
+                value, ok = None, False
+            elapsed = time.perf_counter() - started
+            self._shared_set({code: value}, ok)
+
+            with self._lock:
+                self._stats['fetches'] += 1
+                self._stats['fetch_seconds'] += elapsed
+                if not ok:
+                    self._stats['errors'] += 1
+                self._store(code, value, ok)
+                return value if ok else self._fallback(code, default)
+        finally:
+            # 저장/TTL 계산에서 예외가 나도 기다리던 스레드를 깨우고, 다음 호출은 새로 조회하도록
+            with self._lock:
+                self._inflight.pop(code, None)
+            waiter.set()
+
+    def get_many(self, codes, default=0, timeout=None):
+        timeout = self.timeout if timeout is None else timeout
+        result, misses = {}, []
+        with self._lock:
+            now = self._clock()
+            for code in dict.fromkeys(codes):
+                entry = self._lookup(code, now)
+                if entry is None:
+                    misses.append(code)
+                else:
+                    self._stats['hits'] += 1
+                    result[code] = entry.value if entry.ok else self._fallback(code, default)
+        if not misses:
+            return result
+
+        shared = self._shared_get(misses)
+        if shared:
+            with self._lock:
+                for code, (ok, value) in shared.items():
+                    self._stats['misses'] += 1
+                    self._stats['shared_hits'] += 1
+                    self._store(code, value, ok)
+                    result[code] = value if ok else self._fallback(code, default)
+            misses = [code for code in misses if code not in result]
+            if not misses:
+                return result
+
+        if self._bulk_fetch is not None and len(misses) >= self.bulk_threshold:
+            try:
+                snapshot = self._bulk_fetch()
+            except Exception:
+                snapshot = {}
+            with self._lock:
+                for code in misses:
+                    if code in snapshot:
+                        self._stats['misses'] += 1
+                        self._store(code, snapshot[code], True)
+                        result[code] = snapshot[code]
+            misses = [code for code in misses if code not in result]
+            self._shared_set({code: snapshot[code] for code in snapshot.keys() & result.keys()})
+
+        # 남은 미스는 개별 조회를 병렬로 (get()을 거치므로 요청 합치기/실패 캐싱도 그대로 적용)
+        futures = {self._pool.submit(self.get, code, default): code for code in misses}
+        done, _ = wait(futures, timeout=timeout)
+        with self._lock:
+            for fut, code in futures.items():
+                result[code] = fut.result() if fut in done else self._fallback(code, default)
+        return result
+
+    def put(self, code, value):
+        with self._lock:
+            self._store(code, value, True)
+
+    def invalidate(self, code=None):
+        with self._lock:
+            if code is None:
+                self._data.clear()
+            else:
+                self._data.pop(code, None)
+
+    def stats(self):
+        with self._lock:
+            s = dict(self._stats)
+            s['size'] = len(self._data)
+        lookups = s['hits'] + s['misses']
+        s['hit_ratio'] = (s['hits'] / lookups) if lookups else 0.0
+        s['avg_fetch_ms'] = (s['fetch_seconds'] / s['fetches'] * 1000) if s['fetches'] else 0.0
+        return s
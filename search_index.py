@@ -0,0 +1,84 @@
+from bisect import bisect_left
+
+# ==========================================
+# 종목 검색 인덱스 (코드/이름 접두어, 초성, 부분 문자열)
+# ==========================================
+CHOSUNG = 'ㄱㄲㄴㄷㄸㄹㅁㅂㅃㅅㅆㅇㅈㅉㅊㅋㅌㅍㅎ'
+_CHOSUNG_SET = set(CHOSUNG)
+
+
+def chosung(text):
+    # '삼성전자' -> 'ㅅㅅㅈㅈ' (한글 음절이 아닌 문자는 그대로 소문자로)
+    out = []
+    for ch in text:
+        code = ord(ch) - 0xAC00
+        out.append(CHOSUNG[code // 588] if 0 <= code < 11172 else ch.lower())
+    return ''.join(out)
+
+
+def _normalize(text):
+    return ''.join(text.split()).lower()
+
+
+class SearchIndex:
+    """STOCK_DICT(코드 -> 이름)로 만드는 메모리 검색 인덱스.
+
+    접두어 검색은 정렬된 키 배열에서 bisect로 찾고, 결과가 모자랄 때만 부분 문자열을 훑는다.
+    순위: 코드/이름 완전 일치 > 접두어 > 초성 접두어 > 부분 문자열 (같은 순위면 이름이 짧은 순)
+    """
+
+    def __init__(self, items):
+        self.names = dict(items)
+        self._entries = [(code, name, _normalize(name), chosung(_normalize(name)))
+                         for code, name in self.names.items()]
+        self._by_code = sorted((code, i) for i, (code, *_) in enumerate(self._entries))
+        self._by_name = sorted((norm, i) for i, (_, _, norm, _) in enumerate(self._entries))
+        self._by_chosung = sorted((cho, i) for i, (*_, cho) in enumerate(self._entries))
+        self._exact = {}
+        for i, (code, _, norm, _) in enumerate(self._entries):
+            self._exact.setdefault(norm, i)
+            self._exact[code] = i
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, code):
+        return code in self.names
+
+    @staticmethod
+    def _prefix(sorted_keys, prefix, limit):
+        out = []
+        i = bisect_left(sorted_keys, (prefix,))
+        while i < len(sorted_keys) and len(out) < limit and sorted_keys[i][0].startswith(prefix):
+            out.append(sorted_keys[i][1])
+            i += 1
+        return out
+
+    def search(self, query, limit=10):
+        q = _normalize(query or '')
+        if not q:
+            return []
+        ranked = {}
+
+        def add(indices, rank):
+            for i in indices:
+                if i not in ranked or ranked[i] > rank:
+                    ranked[i] = rank
+
+        # 정렬 기준 때문에 접두어 후보는 limit보다 넉넉히 뽑는다
+        wide = limit * 4
+        if q.isdigit():
+            add(self._prefix(self._by_code, q, wide), 1)
+        add(self._prefix(self._by_name, q, wide), 1)
+        if all(ch in _CHOSUNG_SET for ch in q):
+            add(self._prefix(self._by_chosung, q, wide), 2)
+            if len(ranked) < limit:
+                add((i for i, e in enumerate(self._entries) if q in e[3]), 3)
+        if len(ranked) < limit:
+            add((i for i, e in enumerate(self._entries) if q in e[2] or q in e[0]), 3)
+
+        if q in self._exact:
+            ranked[self._exact[q]] = 0
+
+        order = sorted(ranked, key=lambda i: (ranked[i], len(self._entries[i][1]), self._entries[i][0]))
+        return [{'code': self._entries[i][0], 'name': self._entries[i][1]} for i in order[:limit]]
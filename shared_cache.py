@@ -0,0 +1,123 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from urllib.parse import urlparse
+
+
+# ==========================================
+# 워커 프로세스 간 공유 캐시 백엔드
+# ==========================================
+# CACHE_URL 로 선택
+#   memory://                      프로세스 내부 (워커 1개일 때 기본값)
+#   file:///dev/shm/devops.cache   같은 호스트의 워커끼리 공유하는 SQLite 파일 (shm 권장)
+#   redis://host:6379/0            Redis 호환 서버 (redis 패키지 필요)
+# 값은 JSON으로 직렬화되므로 숫자/문자열/리스트/dict만 저장한다.
+class MemoryBackend:
+    def __init__(self, clock=time.time):
+        self._data = {}
+        self._lock = threading.Lock()
+        self._clock = clock
+
+    def get_many(self, keys):
+        now = self._clock()
+        with self._lock:
+            out = {}
+            for key in keys:
+                hit = self._data.get(key)
+                if hit is not None and hit[1] > now:
+                    out[key] = hit[0]
+            return out
+
+    def set_many(self, mapping, ttl):
+        expires = self._clock() + ttl
+        with self._lock:
+            for key, value in mapping.items():
+                self._data[key] = (value, expires)
+
+    def get(self, key):
+        return self.get_many([key]).get(key)
+
+    def set(self, key, value, ttl):
+        self.set_many({key: value}, ttl)
+
+
+class FileBackend(MemoryBackend):
+    def __init__(self, path, clock=time.time):
+        self.path = path
+        self._clock = clock
+        self._local = threading.local()
+        conn = self._conn()
+        conn.execute('CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value TEXT, expires REAL)')
+        conn.commit()
+
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=OFF')
+            self._local.conn = conn
+        return conn
+
+    def get_many(self, keys):
+        keys = list(keys)
+        if not keys:
+            return {}
+        marks = ','.join('?' * len(keys))
+        rows = self._conn().execute(
+            f'SELECT key, value FROM cache WHERE key IN ({marks}) AND expires > ?', (*keys, self._clock()))
+        return {key: json.loads(value) for key, value in rows}
+
+    def set_many(self, mapping, ttl):
+        now = self._clock()
+        conn = self._conn()
+        with conn:
+            conn.executemany('INSERT OR REPLACE INTO cache VALUES (?, ?, ?)',
+                             [(k, json.dumps(v), now + ttl) for k, v in mapping.items()])
+            self._writes = getattr(self, '_writes', 0) + 1
+            if self._writes % 1000 == 0:
+                conn.execute('DELETE FROM cache WHERE expires <= ?', (now,))
+
+
+class RedisBackend:
+    def __init__(self, client):
+        self._client = client
+
+    @classmethod
+    def from_url(cls, url):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("CACHE_URL=redis://... 를 쓰려면 'pip install redis' 가 필요합니다.")
+        return cls(redis.Redis.from_url(url))
+
+    def get_many(self, keys):
+        keys = list(keys)
+        if not keys:
+            return {}
+        return {k: json.loads(v) for k, v in zip(keys, self._client.mget(keys)) if v is not None}
+
+    def set_many(self, mapping, ttl):
+        pipe = self._client.pipeline()
+        for key, value in mapping.items():
+            pipe.set(key, json.dumps(value), px=max(1, int(ttl * 1000)))
+        pipe.execute()
+
+    def get(self, key):
+        return self.get_many([key]).get(key)
+
+    def set(self, key, value, ttl):
+        self.set_many({key: value}, ttl)
+
+
+def from_url(url):
+    parsed = urlparse(url or 'memory://')
+    if parsed.scheme == 'memory':
+        return MemoryBackend()
+    if parsed.scheme == 'file':
+        return FileBackend(parsed.path or os.path.join('/dev/shm', 'devops.cache'))
+    if parsed.scheme in ('redis', 'rediss', 'unix'):
+        return RedisBackend.from_url(url)
+    raise ValueError(f'unsupported CACHE_URL: {url}')
@@ -1,2 +1,945 @@
+import threading
+import time
+
+import pytest
+
+from leaderboard import Leaderboard
+from quote_cache import QuoteCache
+
+
 def test_dummy():
-    assert True
\ No newline at end of file
+    assert True
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_quote_cache_ttl_and_lru():
+    calls = []
+    clock = FakeClock()
+    cache = QuoteCache(lambda c: calls.append(c) or 100, maxsize=2, ttl=10, clock=clock)
+    assert cache.get('A') == 100
+    assert cache.get('A') == 100
+    assert calls == ['A']
+    clock.now = 11
+    cache.get('A')
+    assert calls == ['A', 'A']
+    cache.get('B')
+    cache.get('C')  # A 제거 (LRU)
+    assert cache.stats()['evictions'] == 1
+    cache.get('A')
+    assert calls[-1] == 'A'
+
+
+def test_quote_cache_caches_failures_briefly():
+    calls = []
+    clock = FakeClock()
+
+    def fetch(code):
+        calls.append(code)
+        raise KeyError(code)
+
+    cache = QuoteCache(fetch, ttl=30, error_ttl=5, clock=clock)
+    assert cache.get('BAD') == 0
+    assert cache.get('BAD', default=None) is None
+    assert len(calls) == 1
+    clock.now = 6
+    cache.get('BAD')
+    assert len(calls) == 2
+    assert cache.stats()['errors'] == 2
+
+
+def test_quote_cache_serves_last_good_price_on_failure():
+    clock, up = FakeClock(), [True]
+
+    def fetch(code):
+        if not up[0]:
+            raise TimeoutError(code)
+        return 100
+
+    cache = QuoteCache(fetch, ttl=30, error_ttl=5, clock=clock, max_workers=2)
+    assert cache.get_many(['A'], default=None) == {'A': 100}
+    up[0] = False
+    clock.now = 31
+    # 만료 후 조회가 실패해도 0/None 대신 마지막 시세
+    assert cache.get('A', default=None) == 100
+    assert cache.get_many(['A', 'NEW'], default=None) == {'A': 100, 'NEW': None}
+    assert cache.stats()['stale'] >= 2
+
+
+def test_failed_quotes_do_not_zero_rankings_or_holdings():
+    import pandas as pd
+    from live import QuotePublisher
+    from valuation import value_positions
+
+    prices = {'A': 100}
+    board = make_leaderboard({1: ('kim', 0)}, {1: {'A': (10, 900.0)}}, prices)
+    board.refresh()
+    assert board.asset(1) == 1000
+    assert board.apply_prices({'A': None}) == 0 and board.asset(1) == 1000
+
+    pub = QuotePublisher(lambda codes: {c: None for c in codes}, board)
+    pub._thread = object()
+    sub = pub.subscribe(['A'], user_id=1)
+    pub.publish_once()
+    events = []
+    while not sub.queue.empty():
+        events.append(sub.queue.get_nowait())
+    assert 'quotes' not in dict(events) and board.asset(1) == 1000
+
+    positions = pd.DataFrame({'user_id': [1, 1], 'code': ['A', 'B'], 'name': ['A', 'B'],
+                              'quantity': [10, 2], 'avg_price': [90.0, 50.0]})
+    valued = value_positions(positions, {'A': 100, 'B': None})
+    assert valued['value'].tolist() == [1000.0, 100.0] and valued['rate'].tolist()[1] == 0.0
+
+    # 한 번도 시세를 못 받은 종목은 랭킹에서도 0원이 아니라 매입금액 (대시보드 총자산과 같은 값)
+    prices = {'A': 100, 'B': None}
+    board = make_leaderboard({1: ('kim', 0)}, {1: {'A': (10, 900.0), 'B': (2, 100.0)}}, prices)
+    board.refresh()
+    assert board.asset(1) == valued['value'].sum() == 1100
+    assert board.apply_prices({'B': 80}) == 1 and board.asset(1) == 1160
+    board.reload_user(1)
+    assert board.asset(1) == 1160
+
+
+def test_quote_cache_coalesces_concurrent_misses():
+    calls = []
+    gate = threading.Event()
+
+    def fetch(code):
+        calls.append(code)
+        gate.wait(1)
+        return 7
+
+    cache = QuoteCache(fetch)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get('X'))) for _ in range(8)]
+    for t in threads:
+        t.start()
+    time.sleep(0.05)
+    gate.set()
+    for t in threads:
+        t.join()
+    assert results == [7] * 8
+    assert calls == ['X']
+
+
+def test_quote_cache_leader_failure_does_not_block_later_callers():
+    broken = [True]
+
+    def ttl():
+        if broken[0]:
+            raise RuntimeError('schedule')
+        return 30
+
+    cache = QuoteCache(lambda c: 5, ttl=ttl, timeout=0.2)
+    with pytest.raises(RuntimeError):
+        cache.get('A')
+    broken[0] = False
+    results = []
+    t = threading.Thread(target=lambda: results.append(cache.get('A')), daemon=True)
+    t.start()
+    t.join(2)
+    assert results == [5]   # 이전 리더의 예외로 멈추지 않고 새로 조회
+
+    # 조회가 멈춘 리더를 기다리는 스레드도 timeout 뒤에는 default로 돌아옴
+    gate = threading.Event()
+    slow = QuoteCache(lambda c: gate.wait(5) and 7, timeout=0.1)
+    threading.Thread(target=slow.get, args=('B',), daemon=True).start()
+    time.sleep(0.05)
+    started = time.monotonic()
+    assert slow.get('B', default=-1) == -1 and time.monotonic() - started < 1
+    gate.set()
+
+
+def test_quote_cache_get_many_dedupes_and_uses_bulk_snapshot():
+    calls, bulk_calls = [], []
+
+    def bulk():
+        bulk_calls.append(1)
+        return {'A': 1, 'B': 2, 'C': 3}
+
+    cache = QuoteCache(lambda c: calls.append(c) or 9, bulk_fetch=bulk, bulk_threshold=3)
+    assert cache.get_many(['A', 'A', 'B']) == {'A': 9, 'B': 9}
+    assert sorted(calls) == ['A', 'B']
+    assert cache.get_many(['C', 'D', 'E']) == {'C': 3, 'D': 9, 'E': 9}
+    assert bulk_calls == [1]
+    assert sorted(calls) == ['A', 'B', 'D', 'E']
+
+
+def test_quote_cache_get_many_times_out_slow_fetches():
+    cache = QuoteCache(lambda c: time.sleep(0.5) or 1, timeout=0.05)
+    assert cache.get_many(['SLOW'], default=-1) == {'SLOW': -1}
+
+
+def make_leaderboard(users, holdings, prices):
+    def load(user_id=None):
+        if user_id is None:
+            return dict(users), dict(holdings)
+        return ({user_id: users[user_id]} if user_id in users else {},
+                {user_id: holdings.get(user_id, {})})
+    return Leaderboard(load, lambda codes: {c: prices[c] for c in codes})
+
+
+def test_leaderboard_top_and_rank():
+    users = {1: ('a', 100), 2: ('b', 500), 3: ('c', 0)}
+    holdings = {3: {'X': (10, 300.0)}}
+    board = make_leaderboard(users, holdings, {'X': 30})
+    board.refresh()
+    assert [r['nickname'] for r in board.top(2)] == ['b', 'c']
+    assert board.rank(1) == 3
+    assert board.rank(99) is None
+
+
+def test_leaderboard_incremental_updates():
+    users = {1: ('a', 100), 2: ('b', 200)}
+    holdings = {1: {'X': (10, 50.0)}}
+    prices = {'X': 5}
+    board = make_leaderboard(users, holdings, prices)
+    board.refresh()
+    assert board.rank(1) == 2
+    assert board.apply_prices({'X': 20}) == 1
+    assert board.rank(1) == 1 and board.asset(1) == 300
+    users[2] = ('b', 1000)
+    board.reload_user(2)
+    assert board.rank(2) == 1 and len(board) == 2
+
+
+class FakeFdr:
+    def __init__(self):
+        self.reads = []
+
+    def StockListing(self, market):
+        import pandas as pd
+        return pd.DataFrame({'Code': ['000001', '000002'], 'Name': ['가', '나'], 'Market': ['KOSPI', 'KOSDAQ'],
+                             'Close': [100, 200], 'ChagesRatio': [1.0, -1.0], 'Marcap': [2e12, 1e12],
+                             'Volume': [10, 20]})
+
+    def DataReader(self, code, start=None, end=None):
+        import pandas as pd
+        self.reads.append((code, start.date()))
+        idx = pd.date_range(start, '2026-10-16', freq='B')
+        return pd.DataFrame({'Open': 1.0, 'High': 1.0, 'Low': 1.0, 'Close': 5.0, 'Volume': 1.0}, index=idx)
+
+
+def test_market_ingestor_fetches_only_missing_dates(tmp_path):
+    from datetime import date
+
+    from market_store import MarketIngestor, MarketStore
+
+    store = MarketStore(str(tmp_path / 'market.db'))
+    fdr = FakeFdr()
+    ingestor = MarketIngestor(store, fdr, tracked_codes=lambda: ['000002'], history_days=30)
+    ingestor.run_once()
+    assert store.names() == {'000001': '가', '000002': '나'}
+    assert [r['Code'] for r in store.listing('KOSPI')] == ['000001']
+    assert store.latest_close('000002') == 200
+    assert sorted(c for c, _ in fdr.reads) == ['000001', '000002']
+    fdr.reads.clear()
+    ingestor.refresh_history('000002', today=date(2026, 10, 16))
+    assert fdr.reads == [('000002', date(2026, 10, 16))]
+    assert store.last_date('000002') == date(2026, 10, 16)
+
+
+def test_chart_downsampling_keeps_endpoints_and_extremes():
+    import numpy as np
+
+    from chart_data import build_series, lttb, minmax
+
+    x = np.arange(1000, dtype=float)
+    y = np.sin(x / 50) * 100
+    y[437] = 500
+    for fn in (lttb, minmax):
+        idx = fn(x, y, 50)
+        assert idx[0] == 0 and idx[-1] == 999
+        assert len(idx) <= 50
+        assert 437 in idx
+        assert list(idx) == sorted(idx)
+    days, prices = build_series([('2026-01-01', 10), ('2026-01-02', 11)])
+    assert days.tolist() == [20454, 20455] and prices.dtype == np.float32
+
+
+def test_chart_cache_rebuilds_once_per_day():
+    from datetime import date
+
+    from chart_data import ChartCache
+
+    loads = []
+    today = [date(2026, 10, 15)]
+
+    def load(code, days):
+        loads.append(code)
+        return [('2026-10-14', 100.0), ('2026-10-15', 101.0)]
+
+    cache = ChartCache(load, epoch=lambda: today[0])
+    body, etag = cache.get('005930', 90)
+    assert body == {'labels': ['2026-10-14', '2026-10-15'], 'prices': [100.0, 101.0]}
+    assert cache.get('005930', 90) == (body, etag)
+    assert len(loads) == 1
+    today[0] = date(2026, 10, 16)
+    assert cache.get('005930', 90)[1] == etag
+    assert len(loads) == 2
+
+    # 일봉이 없는 종목도 캐싱 (요청마다 외부 조회 X), empty_ttl이 지나면 다시 읽음
+    clock, empty = FakeClock(), []
+    cache = ChartCache(lambda code, days: empty.append(code) or [], epoch=lambda: today[0], empty_ttl=60,
+                       clock=clock)
+    for _ in range(3):
+        assert cache.get('999999', 90)[0] == {'labels': [], 'prices': []}
+    assert len(empty) == 1
+    clock.now = 61
+    cache.get('999999', 90)
+    assert len(empty) == 2
+
+
+def test_chart_api_rejects_unknown_codes_without_fetching(trading_app):
+    fdr = trading_app.market_ingestor._fdr
+    before = len(fdr.reads)
+    client = trading_app.app.test_client()
+    assert client.get('/api/chart/123456').status_code == 404
+    assert len(fdr.reads) == before
+    assert client.get('/api/chart/000001').status_code == 200
+
+
+def make_trading_app(tmp_path):
+    from flask import Flask
+
+    from models import db, init_db, User
+
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{tmp_path / 'trade.db'}"
+    db.init_app(app)
+    with app.app_context():
+        init_db()
+        db.session.add(User(username='u', password_hash='x', nickname='u', cash=1000))
+        db.session.commit()
+    return app
+
+
+def test_trade_engine_concurrent_buys_cannot_overdraw(tmp_path):
+    from concurrent.futures import ThreadPoolExecutor
+
+    from models import db, User, Stock
+    from trading import execute_order
+
+    app = make_trading_app(tmp_path)
+
+    def buy(key):
+        with app.app_context():
+            return execute_order(1, 'buy', '005930', 1, 600, '삼성전자', idempotency_key=key)
+
+    with ThreadPoolExecutor(8) as pool:
+        results = list(pool.map(buy, [f'k{i}' for i in range(8)]))
+    assert sum(r.ok for r in results) == 1
+    with app.app_context():
+        assert db.session.get(User, 1).cash == 400
+        assert [(s.code, s.quantity) for s in Stock.query.all()] == [('005930', 1)]
+
+
+def test_trade_engine_idempotency_and_sell(tmp_path):
+    from models import db, User, Stock
+    from trading import execute_order
+
+    app = make_trading_app(tmp_path)
+    with app.app_context():
+        assert execute_order(1, 'buy', 'A', 2, 100, 'A', idempotency_key='same').ok
+        assert execute_order(1, 'buy', 'A', 2, 100, 'A', idempotency_key='same').ok
+        assert Stock.query.one().quantity == 2
+        assert not execute_order(1, 'sell', 'A', 3, 150, 'A').ok
+        assert execute_order(1, 'sell', 'A', 2, 150, 'A').ok
+        assert Stock.query.count() == 0
+        assert db.session.get(User, 1).cash == 1100
+
+
+def test_trade_engine_failed_order_releases_idempotency_key(tmp_path, monkeypatch):
+    import trading
+    from models import db, OrderRequest, Stock
+    from trading import execute_order
+
+    app = make_trading_app(tmp_path)
+
+    def locked(*args):
+        raise RuntimeError('database is locked')
+
+    with app.app_context():
+        with monkeypatch.context() as m:
+            m.setattr(trading, '_buy', locked)
+            with pytest.raises(RuntimeError):
+                execute_order(1, 'buy', 'A', 1, 100, 'A', idempotency_key='k1')
+        # 키 기록도 주문과 함께 롤백되어야 같은 키로 다시 보냈을 때 체결됨
+        assert db.session.get(OrderRequest, (1, 'k1')) is None
+        result = execute_order(1, 'buy', 'A', 1, 100, 'A', idempotency_key='k1')
+        assert result.ok, result
+        assert Stock.query.one().quantity == 1
+
+
+def test_trade_ledger_batch_and_rebuild(tmp_path):
+    from models import db, User, Trade
+    from trading import execute_orders, rebuild_positions
+
+    app = make_trading_app(tmp_path)
+    with app.app_context():
+        results = execute_orders(1, [
+            {'action': 'buy', 'code': 'A', 'quantity': 2, 'price': 100, 'name': 'A'},
+            {'action': 'buy', 'code': 'A', 'quantity': 2, 'price': 200, 'name': 'A'},
+            {'action': 'sell', 'code': 'A', 'quantity': 1, 'price': 300, 'name': 'A'},
+            {'action': 'buy', 'code': 'B', 'quantity': 1, 'price': None, 'name': 'B'},
+        ])
+        assert [r.ok for r in results] == [True, True, True, False]
+        assert [t.side for t in Trade.query.order_by(Trade.id)] == ['buy', 'buy', 'sell']
+        cash, positions = rebuild_positions(1, initial_cash=1000)
+        assert cash == db.session.get(User, 1).cash == 700
+        assert positions == {'A': (3, 150.0)}
+
+
+class FakeRedis:
+    # RedisBackend 테스트용 최소 스탠드인 (mget / pipeline().set(px=) 만 구현)
+    def __init__(self):
+        self.data = {}
+
+    def mget(self, keys):
+        return [self.data.get(k) for k in keys]
+
+    def pipeline(self):
+        client = self
+
+        class Pipe:
+            ops = []
+
+            def set(self, key, value, px=None):
+                self.ops.append((key, value.encode()))
+
+            def execute(self):
+                client.data.update(self.ops)
+
+        return Pipe()
+
+
+def test_shared_cache_backends_share_quotes_between_workers(tmp_path):
+    from shared_cache import FileBackend, RedisBackend, from_url
+
+    assert isinstance(from_url(f"file://{tmp_path / 'c.db'}"), FileBackend)
+    for make in (lambda: FileBackend(str(tmp_path / 'shared.db')), lambda r=FakeRedis(): RedisBackend(r)):
+        backend = make()
+        calls = []
+        worker_a = QuoteCache(lambda c: calls.append(c) or 42, shared=backend)
+        worker_b = QuoteCache(lambda c: calls.append(c) or 0, shared=backend)
+        assert worker_a.get('005930') == 42
+        assert worker_b.get('005930') == 42
+        assert worker_b.get_many(['005930']) == {'005930': 42}
+        assert calls == ['005930']
+        assert worker_b.stats()['shared_hits'] == 1
+
+
+def test_shared_file_backend_expires_entries(tmp_path):
+    from shared_cache import FileBackend
+
+    clock = FakeClock()
+    backend = FileBackend(str(tmp_path / 'c.db'), clock=clock)
+    backend.set('k', [1, 2], ttl=10)
+    assert backend.get('k') == [1, 2]
+    clock.now = 11
+    assert backend.get('k') is None
+
+
+def test_listing_names_load_from_snapshot_and_refresh(tmp_path):
+    from market_store import ListingNames, MarketIngestor, MarketStore
+
+    path = str(tmp_path / 'market.db')
+    store = MarketStore(path)
+    names = ListingNames(store, max_age=10, clock=FakeClock())
+    assert len(names) == 0 and names.get('000001', '?') == '?'
+
+    MarketIngestor(store, FakeFdr(), top_n=0, on_listing=names.reload).refresh_listing()
+    assert names.get('000001') == '가'
+    # 다른 프로세스(새 기동)는 네트워크 없이 스냅샷만으로 바로 채워짐
+    assert dict(ListingNames(MarketStore(path)).items()) == {'000001': '가', '000002': '나'}
+
+
+def test_search_index_prefix_chosung_and_substring():
+    from search_index import SearchIndex, chosung
+
+    index = SearchIndex({'005930': '삼성전자', '005935': '삼성전자우', '000660': 'SK하이닉스',
+                         '035420': 'NAVER', '005380': '현대차'}.items())
+    assert chosung('삼성전자') == 'ㅅㅅㅈㅈ'
+    assert [r['code'] for r in index.search('삼성')] == ['005930', '005935']
+    assert [r['code'] for r in index.search('ㅎㄷㅊ')] == ['005380']
+    assert [r['code'] for r in index.search('하이닉')] == ['000660']
+    assert [r['code'] for r in index.search('naver')] == ['035420']
+    assert index.search('0059', limit=1) == [{'code': '005930', 'name': '삼성전자'}]
+    assert index.search('삼성전자우')[0]['code'] == '005935'
+    assert index.search('') == [] and '005930' in index and '999999' not in index
+
+
+def test_quote_publisher_pushes_only_changes():
+    from live import QuotePublisher
+
+    prices = {'A': 100, 'B': 200}
+    board = make_leaderboard({1: ('kim', 1000), 2: ('lee', 1000)}, {1: {'A': (10, 1000.0)}, 2: {'B': (1, 200.0)}}, prices)
+    board.refresh()
+    pub = QuotePublisher(lambda codes: {c: prices[c] for c in codes}, board)
+    pub._thread = object()  # 발행 스레드 없이 publish_once를 직접 호출
+    sub = pub.subscribe(['A'], user_id=2)
+
+    def drain():
+        out = []
+        while not sub.queue.empty():
+            out.append(sub.queue.get_nowait())
+        return out
+
+    pub.publish_once()
+    assert [e for e, _ in drain()] == ['quotes', 'portfolio', 'ranking']
+
+    pub.publish_once()
+    assert drain() == []  # 변경 없음 -> 보낼 것 없음
+
+    prices['B'] = 300     # 구독하지 않은 종목 -> 시세 이벤트 없음
+    prices['A'] = 10      # kim 자산 2000 -> 1100, lee(1200)가 1위
+    pub.publish_once()
+    events = dict(drain())
+    assert events['quotes'] == {'A': 10}
+    assert events['ranking']['my_rank'] == 1
+    assert 'portfolio' not in events
+
+    pub.unsubscribe(sub)
+    assert len(pub) == 0
+
+    # 스트림 상한: 자리가 없으면 None, 해제하면 다시 받음
+    pub.max_subscribers = 1
+    first = pub.subscribe(['A'])
+    assert first is not None and pub.subscribe(['B']) is None
+    pub.unsubscribe(first)
+    assert pub.subscribe(['B']) is not None
+
+
+def test_valuation_vectorized_totals_and_curve_stats():
+    import pandas as pd
+    from valuation import positions_frame, value_positions, value_rows, user_totals, equity_curve, curve_stats
+
+    pos = positions_frame([(1, 'A', 'a', 10, 100.0), (1, 'B', 'b', 5, 200.0), (2, 'A', 'a', 1, 50.0)])
+    valued = value_positions(pos, {'A': 150, 'B': 100})
+    assert valued['value'].tolist() == [1500, 500, 150]
+    assert valued['profit'].tolist() == [500, -500, 100]
+    assert valued['rate'].tolist() == [50, -50, 200]
+    assert valued['weight'].tolist() == [75, 25, 100]
+
+    totals = user_totals(valued, {1: 1000, 2: 0, 3: 700})
+    assert totals.loc[1, 'total_asset'] == 3000 and totals.loc[1, 'rate'] == 0
+    assert totals.loc[3, 'total_asset'] == 700
+    # 대시보드용 루프 평가도 같은 값 (시세 없는 종목은 평균 단가)
+    holdings, total = value_rows([('A', 'a', 10, 100.0), ('B', 'b', 5, 200.0)], {'A': 150})
+    assert total == 2500 and [h['profit'] for h in holdings] == [500, 0]
+    assert [h['weight'] for h in holdings] == [60, 40]
+
+    history = {'A': [('2024-01-01', 100), ('2024-01-02', 120), ('2024-01-03', 90)],
+               'B': [('2024-01-01', 10), ('2024-01-03', 10)]}
+    curve = equity_curve({'A': 1, 'B': 10}, 0, lambda code, days: history[code])
+    assert curve.tolist() == [200, 220, 190]   # B의 빈 날은 직전 종가로 채움
+    stats = curve_stats(curve)
+    assert round(stats['return'], 2) == -5.0
+    assert round(stats['max_drawdown'], 2) == round((190 / 220 - 1) * 100, 2)
+    assert curve_stats(pd.Series(dtype='float64'))['volatility'] == 0.0
+
+
+def test_migrate_db_copies_tables_and_keeps_ids(tmp_path):
+    from flask import Flask
+
+    from migrate_db import migrate
+    from models import db, Stock, Trade, User
+    from trading import execute_order
+
+    app = make_trading_app(tmp_path)
+    with app.app_context():
+        uid = db.session.query(User.id).scalar()
+        execute_order(uid, 'buy', '005930', 3, 100, '삼성전자')
+        mode = db.session.execute(db.text('PRAGMA journal_mode')).scalar()
+    assert mode == 'wal'
+
+    target = f"sqlite:///{tmp_path / 'copy.db'}"
+    counts = migrate(app.config['SQLALCHEMY_DATABASE_URI'], target, log=lambda *a: None)
+    assert counts['user'] == 1 and counts['stock'] == 1 and counts['trade'] == 1
+
+    copy = Flask(__name__)
+    copy.config['SQLALCHEMY_DATABASE_URI'] = target
+    db.init_app(copy)
+    with copy.app_context():
+        assert db.session.get(User, uid).cash == 1000 - 300
+        assert Stock.query.filter_by(user_id=uid, code='005930').one().quantity == 3
+        assert Trade.query.count() == 1
+
+
+def test_request_metrics_server_timing_and_prometheus(tmp_path):
+    from flask import Flask, render_template_string
+
+    from metrics import RequestMetrics, span
+    from models import db, User
+
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{tmp_path / 'm.db'}"
+    db.init_app(app)
+    metrics = RequestMetrics(app, export_dir=str(tmp_path / 'metrics'))
+
+    @app.route('/users/<int:uid>')
+    def user_page(uid):
+        with span('fdr_history'):
+            pass
+        db.session.get(User, uid)
+        return render_template_string('{{ n }}', n=uid)
+
+    with app.app_context():
+        db.create_all()
+    client = app.test_client()
+    for uid in (1, 2):
+        resp = client.get(f'/users/{uid}')
+    timing = resp.headers['Server-Timing']
+    assert 'db;desc="1x"' in timing and 'render;' in timing and 'fdr_history;' in timing and 'total;dur=' in timing
+
+    # 다른 워커가 내보낸 스냅샷도 합쳐서 노출
+    other = RequestMetrics(export_dir=str(tmp_path / 'metrics'))
+    other.latency.observe(0.2, '/users/<int:uid>', 'GET', '200')
+    with open(tmp_path / 'metrics' / '999999.json', 'w') as f:
+        import json
+        json.dump({name: m.snapshot() for name, m in other.registry._metrics.items()}, f)
+
+    body = client.get('/metrics').get_data(as_text=True)
+    assert 'http_request_duration_seconds_count{route="/users/<int:uid>",method="GET",status="200"} 3' in body
+    assert 'http_request_duration_seconds_bucket{route="/users/<int:uid>",method="GET",status="200",le="+Inf"} 3' \
+        in body
+    assert 'upstream_call_seconds_count{call="fdr_history"} 2' in body
+    assert 'http_request_db_queries_bucket{route="/users/<int:uid>",le="1"} 2' in body
+    assert metrics.registry.render().count('# TYPE') == 4
+
+
+def test_fake_fdr_is_deterministic_and_feeds_the_store(tmp_path):
+    import os
+    import sys
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'bench'))
+    from fake_fdr import FakeFinanceDataReader
+    from market_store import MarketIngestor, MarketStore
+
+    a = FakeFinanceDataReader(n_listings=20, seed=7, today='2026-10-16')
+    b = FakeFinanceDataReader(n_listings=20, seed=7, today='2026-10-16')
+    listing = a.StockListing('KRX')
+    assert listing.equals(b.StockListing('KRX'))
+    assert set(a.StockListing('KOSPI')['Market']) == {'KOSPI'}
+    history = a.DataReader('000003', '2026-09-01')
+    assert history.index[-1].strftime('%Y-%m-%d') == '2026-10-16'
+    assert history['Close'].iloc[-1] == listing.set_index('Code').loc['000003', 'Close']
+
+    store = MarketStore(str(tmp_path / 'm.db'))
+    ingestor = MarketIngestor(store, fdr=a, history_days=30)
+    ingestor.refresh_listing()
+    ingestor.refresh_history('000003')
+    assert len(store.names()) == 20
+    assert store.latest_close('000003') == int(listing.set_index('Code').loc['000003', 'Close'])
+    assert a.calls == {'StockListing': 3, 'DataReader': 2}
+
+
+def test_board_snapshot_sorts_and_caches_cards_per_version(tmp_path):
+    from board_snapshot import BoardSnapshot
+    from market_store import MarketIngestor, MarketStore
+
+    store = MarketStore(str(tmp_path / 'm.db'))
+    ingestor = MarketIngestor(store, fdr=FakeFdr())
+    ingestor.refresh_listing()
+    clock, renders = FakeClock(), []
+    snap = BoardSnapshot(store, market=None, interval=lambda: 10, clock=clock,
+                         render=lambda stocks: renders.append(stocks) or ','.join(s['Code'] for s in stocks))
+    assert [s['Code'] for s in snap.top(2, 'marcap')] == ['000001', '000002']
+    assert [s['Code'] for s in snap.top(2, 'volume')] == ['000002', '000001']
+    assert snap.top(1, 'change')[0]['Code'] == '000001'
+
+    assert snap.cards(2, 'volume') == snap.cards(2, 'volume') == '000002,000001'
+    assert len(renders) == 1
+    ingestor.refresh_listing()
+    assert snap.cards(2, 'volume') and len(renders) == 1  # 확인 주기 전에는 기존 스냅샷
+    clock.now = 10
+    snap.cards(2, 'volume')
+    assert len(renders) == 2 and snap.version == store.listing_updated_at()
+
+
+def test_market_schedule_session_eod_and_holidays():
+    from datetime import datetime
+    from market_hours import KST, MarketSchedule
+
+    sched = MarketSchedule(max_ttl=1800)
+    at = lambda *a: datetime(*a, tzinfo=KST)
+    assert [sched.phase(at(2026, 10, 16, h, m)) for h, m in ((8, 0), (10, 0), (15, 40), (16, 0))] == \
+        ['pre', 'open', 'post', 'closed']
+    assert sched.phase(at(2026, 10, 17, 10, 0)) == 'closed'    # 토요일
+    assert sched.phase(at(2026, 10, 9, 10, 0)) == 'closed'     # 한글날
+
+    # 수집: 장중 60초 -> 마감 후 15:45에 한 번 -> 다음 개장까지 (10/9 휴장 건너뜀)
+    assert sched.refresh_in(60, at(2026, 10, 8, 10, 0)) == 60
+    assert sched.refresh_in(60, at(2026, 10, 8, 15, 31)) == 14 * 60
+    after_eod = at(2026, 10, 8, 15, 45, 5)
+    assert sched.refresh_in(60, after_eod) == (at(2026, 10, 12, 9, 0) - after_eod).total_seconds()
+    assert sched.next_open(at(2026, 10, 8, 15, 45)) == at(2026, 10, 12, 9, 0)
+
+    # 캐시 TTL / 권장 폴링: 장중에는 그대로, 장외에는 다음 개장까지 (상한 max_ttl)
+    assert sched.ttl(30, now=at(2026, 10, 16, 10, 0)) == 30
+    assert sched.ttl(30, now=at(2026, 10, 17, 10, 0)) == 1800
+    assert sched.ttl(30, now=at(2026, 10, 16, 8, 59, 50)) == 30
+    assert sched.status(30, at(2026, 10, 17, 10, 0)) == {
+        'phase': 'closed', 'is_open': False, 'next_open': '2026-10-19T09:00:00+09:00', 'poll_interval': 1800}
+
+    # 차트 캐시 epoch: 장중에는 주기마다, 마감 후 종가 확정부터 다음 개장까지는 고정
+    assert sched.epoch(60, at(2026, 10, 16, 10, 0)) != sched.epoch(60, at(2026, 10, 16, 10, 1))
+    assert sched.epoch(60, at(2026, 10, 16, 16, 0)) == sched.epoch(60, at(2026, 10, 19, 8, 0))
+    assert sched.epoch(60, at(2026, 10, 16, 15, 50)) != sched.epoch(60, at(2026, 10, 16, 16, 0))
+
+
+def test_market_schedule_holidays_from_file_and_uncovered_year_warning(tmp_path, caplog):
+    import logging
+    from datetime import date, datetime
+    from market_hours import KST, MarketSchedule, holidays_from_env
+
+    path = tmp_path / 'holidays.txt'
+    path.write_text('# 2027\n2027-01-01  # 신정\n2027-02-08, 2027-02-09\n', encoding='utf-8')
+    holidays = holidays_from_env('2027-03-02', path=str(path))
+    assert holidays == {date(2027, 1, 1), date(2027, 2, 8), date(2027, 2, 9), date(2027, 3, 2)}
+
+    # 달력에 없는 해는 조용히 거래일로 보지 않고, 해마다 한 번 경고
+    sched = MarketSchedule(holidays)
+    with caplog.at_level(logging.WARNING, logger='market_hours'):
+        assert sched.phase(datetime(2027, 2, 8, 10, 0, tzinfo=KST)) == 'closed'
+        assert not caplog.records
+        assert sched.phase(datetime(2028, 1, 3, 10, 0, tzinfo=KST)) == 'open'
+        sched.phase(datetime(2028, 1, 4, 10, 0, tzinfo=KST))
+    assert len(caplog.records) == 1 and '2028년' in caplog.records[0].getMessage()
+
+
+def test_init_db_concurrent_workers_with_lock(tmp_path):
+    import os
+    import subprocess
+    import sys
+
+    # gunicorn 워커들이 빈 DB에 동시에 기동하는 상황: 잠금이 있으면 모두 성공해야 함
+    script = (
+        'import sys\n'
+        'from flask import Flask\n'
+        'from models import db, init_db\n'
+        'app = Flask(__name__)\n'
+        'app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite:///" + sys.argv[1]\n'
+        'db.init_app(app)\n'
+        'with app.app_context():\n'
+        '    init_db(sys.argv[2])\n'
+    )
+    root = os.path.dirname(os.path.abspath(__file__))
+    args = [sys.executable, '-c', script, str(tmp_path / 'stock.db'), str(tmp_path / 'init.lock')]
+    procs = [subprocess.Popen(args, cwd=root, stderr=subprocess.PIPE) for _ in range(6)]
+    errors = [err.decode() for err, code in ((p.communicate()[1], p.returncode) for p in procs) if code != 0]
+    assert errors == []
+
+
+@pytest.fixture(scope='module')
+def trading_app(tmp_path_factory):
+    # 실제 app 모듈을 임시 DB/시세 저장소로 import (app은 import 시점에 환경변수를 읽음)
+    import importlib
+    import os
+
+    workdir = tmp_path_factory.mktemp('app')
+    env = {'DATABASE_URL': f"sqlite:///{workdir / 'stock.db'}", 'MARKET_DB_PATH': str(workdir / 'market.db'),
+           'MARKET_INGEST_ENABLED': '0', 'CACHE_URL': 'memory://'}
+    saved = {k: os.environ.get(k) for k in list(env) + ['METRICS_DIR']}
+    os.environ.update(env)
+    os.environ.pop('METRICS_DIR', None)
+    try:
+        module = importlib.import_module('app')
+    finally:
+        for k, v in saved.items():
+            if v is None:
+                os.environ.pop(k, None)
+            else:
+                os.environ[k] = v
+    module.market_ingestor._fdr = FakeFdr()
+    module.market_ingestor.refresh_listing()
+    return module
+
+
+def login_client(trading_app, username):
+    client = trading_app.app.test_client()
+    client.post('/register', data={'username': username, 'password': 'pw', 'nickname': username})
+    assert client.post('/login', data={'username': username, 'password': 'pw'}).status_code == 302
+    return client
+
+
+def test_orders_api_client_order_id_is_per_user(trading_app):
+    a, b = login_client(trading_app, 'order_a'), login_client(trading_app, 'order_b')
+    order = {'orders': [{'action': 'buy', 'code': '000001', 'quantity': 1, 'client_order_id': '1'}]}
+    for client in (a, b, a):
+        results = client.post('/api/orders', json=order).get_json()['results']
+        assert results[0]['ok'], results
+    with trading_app.app.app_context():
+        from models import Stock
+        assert sorted(s.quantity for s in Stock.query.filter_by(code='000001')) == [1, 1]
+
+
+def test_orders_api_rejects_bad_items_without_500(trading_app):
+    client = login_client(trading_app, 'order_c')
+    resp = client.post('/api/orders', json={'orders': [
+        {'action': 'buy', 'code': '000001', 'quantity': 1, 'client_order_id': {'x': 1}},
+        {'action': 'buy', 'code': '000001', 'quantity': 10 ** 30},
+        {'action': 'buy', 'code': '000001', 'quantity': 2.9},
+        {'action': 'buy', 'code': '000001', 'quantity': '2'},
+        {'action': 'buy', 'code': '000001', 'quantity': 1, 'client_order_id': 'x' * 65},
+        'not an order',
+    ]})
+    assert resp.status_code == 200
+    body = resp.get_json()
+    assert [r['ok'] for r in body['results']] == [False, False, False, True, False, False]
+    assert body['filled'] == 1
+    assert client.post('/api/orders', json={'orders': []}).status_code == 400
+    assert client.post('/api/orders', data='x', content_type='application/json').status_code == 400
+    assert client.post('/api/orders', json=[1, 2]).status_code == 400
+    assert client.post('/api/orders', json='orders').status_code == 400
+
+
+def test_portfolio_api_for_user_without_holdings(trading_app):
+    client = login_client(trading_app, 'portfolio_empty')
+    resp = client.get('/api/portfolio')
+    assert resp.status_code == 200, resp.data[:300]
+    body = resp.get_json()
+    assert body['positions'] == [] and body['equity'] == {'labels': [], 'values': []}
+    assert body['stats']['days'] == 0
+
+
+def test_home_renders_holdings_and_ranking_after_trade_form(trading_app):
+    from models import db, OrderRequest, Stock, User
+
+    client = login_client(trading_app, 'dashboard')
+    assert '보유한 주식이 없습니다' in client.get('/').get_data(as_text=True)   # 가입 안내 메시지도 여기서 소비
+    form = {'code': '000001', 'quantity': '3', 'action': 'buy', 'idempotency_key': 'form-1'}
+
+    def submit(data):
+        assert client.post('/trade', data=data).status_code == 302
+        resp = client.get('/')
+        assert resp.status_code == 200, resp.data[:300]
+        return resp.get_data(as_text=True)
+
+    assert '가 3주 매수 완료' in submit(form)
+    assert '가 3주 매수 완료' in submit(form)    # 재전송/더블클릭: 처음 결과를 그대로, 두 번 체결하지 않음
+    html = submit({**form, 'quantity': '2.5', 'idempotency_key': 'form-2'})
+    assert '잘못된 주문입니다' in html
+    assert 'data-code="000001" data-quantity="3"' in html and '비중 100.0%' in html
+    assert 'id="rankingList"' in html and 'rank-item' in html
+    with trading_app.app.app_context():
+        user = User.query.filter_by(username='dashboard').one()
+        assert [(s.code, s.quantity) for s in Stock.query.filter_by(user_id=user.id)] == [('000001', 3)]
+        assert user.cash == 1000000 - 300
+        assert OrderRequest.query.filter_by(user_id=user.id).count() == 1
+        # 대시보드 총자산과 랭킹 자산이 같은 값
+        assert trading_app.leaderboard.asset(user.id) == user.cash + 300
+    assert f'{1000000:,} 원' in html
+    assert f'내 순위: {trading_app.leaderboard.rank(user.id)}위' in html
+
+
+def test_metrics_export_quote_cache_stats(trading_app):
+    client = login_client(trading_app, 'metrics_user')
+    trading_app.quote_cache.invalidate('000001')
+    assert trading_app.get_current_price_cached('000001') == 100
+    body = client.get('/metrics').get_data(as_text=True)
+    stats = trading_app.quote_cache.stats()
+    assert '# TYPE quote_cache_hits_total counter' in body and '# TYPE quote_cache_entries gauge' in body
+    assert f"quote_cache_misses_total {stats['misses']:g}" in body
+    assert 'quote_cache_fetch_seconds_total ' in body
+
+
+def test_market_ingestor_thread_survives_errors(tmp_path):
+    from market_store import MarketIngestor, MarketStore
+
+    def broken():
+        raise RuntimeError('db down')
+
+    store = MarketStore(str(tmp_path / 'm.db'))
+    ingestor = MarketIngestor(store, FakeFdr(), tracked_codes=broken, interval=broken, retry_interval=0.05,
+                              lock_path=str(tmp_path / 'missing' / 'ingest.lock'))
+    thread = ingestor.start()
+    assert ingestor.request('000001', timeout=5)
+    time.sleep(0.2)   # 몇 주기 동안 잠금/주기 계산이 계속 실패해도
+    assert thread.is_alive() and isinstance(ingestor.last_error, (RuntimeError, OSError))
+    assert ingestor.request('000002', timeout=5)
+    assert store.last_date('000002') is not None
+
+    # 보유 종목 조회가 실패해도 시총 상위 종목 수집은 계속
+    other = MarketIngestor(store, FakeFdr(), tracked_codes=broken)
+    other.run_once()
+    assert other.last_run is not None and isinstance(other.last_error, RuntimeError)
+
+
+def test_board_renders_listing_rows_with_missing_values(trading_app):
+    import pandas as pd
+
+    client = login_client(trading_app, 'board_nan')
+    trading_app.market_store.upsert_listing(pd.DataFrame({
+        'Code': ['000003'], 'Name': ['다'], 'Market': ['KOSPI'], 'Close': [float('nan')],
+        'ChagesRatio': [float('nan')], 'Marcap': [3e12], 'Volume': [float('nan')]}))
+    trading_app.board_snapshot.reload()
+    resp = client.get('/board?sort=change')
+    assert resp.status_code == 200 and '다'.encode() in resp.data
+
+
+def test_board_snapshot_fills_after_cold_start_ingest(trading_app, tmp_path):
+    from board_snapshot import BoardSnapshot
+    from market_store import MarketStore
+
+    # 수집기가 목록을 저장하면 (장외의 긴 확인 주기와 상관없이) 바로 게시판에 반영
+    assert trading_app.board_snapshot.version is not None
+    assert '000001' in [s['Code'] for s in trading_app.board_snapshot.top(5)]
+
+    store = MarketStore(str(tmp_path / 'm.db'))
+    snap = BoardSnapshot(store, interval=lambda: 1800.0, render=lambda stocks: '')
+    assert snap.top(5) == [] and snap.version is None
+    store.upsert_listing(FakeFdr().StockListing('KRX'))
+    assert [s['Code'] for s in snap.top(5)] == ['000001']
+
+
+def test_board_snapshot_reload_during_sort_does_not_mix_versions():
+    from board_snapshot import BoardSnapshot
+
+    class Store:
+        version = 1
+
+        def listing_updated_at(self):
+            return self.version
+
+        def listing(self, market=None, limit=None):
+            if self.version == 1:
+                return [Row(Code='A', Volume=1), Row(Code='B', Volume=2)]
+            return [{'Code': 'A', 'Volume': 9}, {'Code': 'B', 'Volume': 2}]
+
+    class Row(dict):
+        # 정렬 도중 다른 요청이 새 목록으로 reload 하는 상황을 재현
+        def __getitem__(self, key):
+            if key == 'Volume' and store.version == 1:
+                store.version = 2
+                snap.reload()
+            return dict.__getitem__(self, key)
+
+    store = Store()
+    snap = BoardSnapshot(store, market=None, render=lambda stocks: ','.join(s['Code'] for s in stocks))
+    assert [s['Code'] for s in snap.top(2, 'volume')] == ['B', 'A']   # 요청 시작 시점의 목록 기준
+    assert snap.version == 2
+    assert [s['Code'] for s in snap.top(2, 'volume')] == ['A', 'B']   # 새 버전에 예전 순서가 남지 않음
+    assert snap.cards(2, 'volume') == 'A,B'
+
+
+def test_trade_engine_generic_upsert_without_on_conflict(tmp_path, monkeypatch):
+    import trading
+    from models import db, User, Stock
+    from trading import execute_order
+
+    # ON CONFLICT 가 없는 DB(MySQL 등)와 같은 경로: 조건부 UPDATE -> INSERT
+    monkeypatch.setattr(trading, '_insert', lambda table: None)
+    app = make_trading_app(tmp_path)
+    with app.app_context():
+        assert execute_order(1, 'buy', 'A', 2, 100, 'A').ok
+        assert execute_order(1, 'buy', 'A', 2, 200, 'A').ok
+        stock = Stock.query.one()
+        assert (stock.quantity, stock.avg_price) == (4, 150)
+        assert db.session.get(User, 1).cash == 400
@@ -0,0 +1,144 @@
+from collections import namedtuple
+
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
+
+from models import db, User, Stock, OrderRequest, Trade
+
+# ==========================================
+# 주문 체결 엔진
+# ==========================================
+# 잔고/수량 검사를 파이썬에서 읽고 쓰는 대신 조건부 UPDATE 한 문장으로 처리해서
+# 동시에 들어온 주문이 같은 잔고를 두 번 쓰지 못하게 한다.
+# (Postgres에서는 조건부 UPDATE가 해당 행에 잠금을 잡으므로 SELECT ... FOR UPDATE와 같은 효과)
+OrderResult = namedtuple('OrderResult', 'ok message')
+MAX_QUANTITY = 1_000_000_000     # 주문당 수량 상한 (DB 정수 범위를 넘는 값이 500으로 새지 않도록)
+MAX_KEY_LENGTH = 64
+
+
+def _insert(table):
+    # INSERT ... ON CONFLICT 를 지원하는 DB만 (그 밖의 DB는 None -> _upsert_position의 일반 경로)
+    dialect = db.engine.dialect.name
+    if dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        return None
+    return insert(table)
+
+
+def _upsert_position(user_id, code, name, qty, price):
+    t = Stock.__table__
+    # avg_price를 quantity보다 먼저: SET을 왼쪽부터 적용하는 DB(MySQL)에서도 기존 수량으로 계산되도록
+    new_values = (
+        ('avg_price', (t.c.quantity * t.c.avg_price + price * qty) / (t.c.quantity + qty)),
+        ('quantity', t.c.quantity + qty),
+        ('name', name),
+    )
+    stmt = _insert(t)
+    if stmt is not None:
+        db.session.execute(stmt.values(user_id=user_id, code=code, name=name, quantity=qty, avg_price=price)
+                           .on_conflict_do_update(index_elements=['user_id', 'code'], set_=dict(new_values)))
+        return
+    # 일반 경로: 조건부 UPDATE -> 행이 없으면 INSERT. 동시에 다른 주문이 먼저 INSERT 했으면
+    # (user_id, code) 유니크 제약에 걸리므로 UPDATE를 한 번 더
+    holding = update(t).where(t.c.user_id == user_id, t.c.code == code).ordered_values(*new_values)
+    if db.session.execute(holding).rowcount == 1:
+        return
+    try:
+        with db.session.begin_nested():
+            db.session.execute(t.insert().values(user_id=user_id, code=code, name=name, quantity=qty,
+                                                 avg_price=price))
+    except IntegrityError:
+        db.session.execute(holding)
+
+
+def _buy(user_id, code, name, qty, price):
+    cost = price * qty
+    res = db.session.execute(
+        update(User).where(User.id == user_id, User.cash >= cost).values(cash=User.cash - cost))
+    if res.rowcount != 1:
+        return OrderResult(False, "❌ 잔액이 부족합니다.")
+    _upsert_position(user_id, code, name, qty, price)
+    return OrderResult(True, f"✅ {name} {qty}주 매수 완료!")
+
+
+def _sell(user_id, code, name, qty, price):
+    res = db.session.execute(
+        update(Stock).where(Stock.user_id == user_id, Stock.code == code, Stock.quantity >= qty)
+        .values(quantity=Stock.quantity - qty))
+    if res.rowcount != 1:
+        return OrderResult(False, "❌ 보유 수량이 부족합니다.")
+    db.session.execute(update(User).where(User.id == user_id).values(cash=User.cash + price * qty))
+    Stock.query.filter_by(user_id=user_id, code=code, quantity=0).delete()
+    return OrderResult(True, f"✅ {name} {qty}주 매도 완료!")
+
+
+def _apply_order(user_id, action, code, qty, price, name, idempotency_key=None):
+    # 현재 트랜잭션 안에서 주문 하나를 반영 (커밋은 호출한 쪽에서)
+    if (not isinstance(qty, int) or isinstance(qty, bool) or not 0 < qty <= MAX_QUANTITY
+            or action not in ('buy', 'sell') or price is None):
+        return OrderResult(False, "❌ 잘못된 주문입니다.")
+    if idempotency_key is not None and (not isinstance(idempotency_key, str)
+                                        or len(idempotency_key) > MAX_KEY_LENGTH):
+        return OrderResult(False, "❌ 잘못된 주문 ID입니다.")
+    if idempotency_key:
+        # 이미 처리한 키면 처음 결과를 그대로 돌려줌 (키는 사용자별). 처음 보는 키는 주문과 같은 트랜잭션에
+        # 기록하므로, 주문이 실패해 롤백되면 키도 같이 사라져 같은 키로 다시 보낼 수 있음.
+        # (SAVEPOINT는 쓰지 않음: pysqlite에서는 첫 문장이 SAVEPOINT면 RELEASE 때 키만 따로 커밋됨)
+        prev = db.session.get(OrderRequest, (user_id, idempotency_key))
+        if prev is not None:
+            return OrderResult(prev.ok, prev.message or "이미 처리 중인 주문입니다.")
+        db.session.add(OrderRequest(user_id=user_id, key=idempotency_key))
+        db.session.flush()
+    result = (_buy if action == 'buy' else _sell)(user_id, code, name, qty, price)
+    if result.ok:
+        # 포지션 변경과 같은 트랜잭션으로 원장 기록
+        db.session.add(Trade(user_id=user_id, code=code, name=name, side=action, quantity=qty, price=price))
+    if idempotency_key:
+        db.session.execute(update(OrderRequest)
+                           .where(OrderRequest.user_id == user_id, OrderRequest.key == idempotency_key)
+                           .values(ok=result.ok, message=result.message))
+    return result
+
+
+def execute_orders(user_id, orders):
+    """주문 여러 건을 한 트랜잭션(커밋 1번)으로 처리.
+
+    orders: [{'action', 'code', 'quantity', 'price', 'name', 'idempotency_key'(선택)}, ...]
+    """
+    for attempt in range(2):
+        try:
+            results = [_apply_order(user_id, o['action'], o['code'], o['quantity'], o['price'], o['name'],
+                                    o.get('idempotency_key')) for o in orders]
+            db.session.commit()
+            return results
+        except IntegrityError:
+            # 같은 키로 동시에 들어온 주문이 먼저 커밋함 -> 전부 되돌리고 한 번 더
+            # (다시 돌면 그 키는 먼저 커밋된 결과를 그대로 돌려줌)
+            db.session.rollback()
+            if attempt:
+                raise
+        except Exception:
+            db.session.rollback()
+            raise
+
+
+def execute_order(user_id, action, code, qty, price, name, idempotency_key=None):
+    return execute_orders(user_id, [{'action': action, 'code': code, 'quantity': qty, 'price': price,
+                                     'name': name, 'idempotency_key': idempotency_key}])[0]
+
+
+def rebuild_positions(user_id, initial_cash=1000000.0):
+    # 원장만으로 현금/보유 종목을 다시 계산 (감사, 복구용)
+    cash, positions = initial_cash, {}
+    for t in Trade.query.filter_by(user_id=user_id).order_by(Trade.ts, Trade.id):
+        qty, avg = positions.get(t.code, (0, 0.0))
+        if t.side == 'buy':
+            cash -= t.price * t.quantity
+            positions[t.code] = (qty + t.quantity, (qty * avg + t.price * t.quantity) / (qty + t.quantity))
+        else:
+            cash += t.price * t.quantity
+            positions[t.code] = (qty - t.quantity, avg)
+    return cash, {code: p for code, p in positions.items() if p[0] > 0}
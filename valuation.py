@@ -0,0 +1,144 @@
+import numpy as np
+import pandas as pd
+
+
+# ==========================================
+# 포트폴리오 평가 (pandas/numpy 벡터 연산)
+# ==========================================
+# 종목 한 줄씩 파이썬 루프로 평가하지 않고, 보유 내역 전체를 배열로 만들어 시세 벡터와 한 번에 계산한다.
+POSITION_COLUMNS = ['user_id', 'code', 'name', 'quantity', 'avg_price']
+TRADING_DAYS = 252
+
+
+def positions_frame(rows):
+    # rows: (user_id, code, name, quantity, avg_price) 반복자 -> DataFrame
+    cols = list(zip(*rows)) or [()] * len(POSITION_COLUMNS)
+    return pd.DataFrame({
+        'user_id': np.asarray(cols[0], dtype='int64'),
+        'code': np.asarray(cols[1], dtype=object),
+        'name': np.asarray(cols[2], dtype=object),
+        'quantity': np.asarray(cols[3], dtype='int64'),
+        'avg_price': np.asarray(cols[4], dtype='float64'),
+    })
+
+
+def price_vector(codes, prices, default=0):
+    # 종목코드 배열 순서대로 시세를 맞춘 float 배열 (시세가 없으면 default)
+    # 몇 줄짜리 포트폴리오는 Series.map 준비 비용이 더 커서 dict 조회로 처리
+    if len(codes) < 256:
+        get = prices.get
+        return np.fromiter((default if (p := get(c)) is None else p for c in codes), dtype='float64',
+                           count=len(codes))
+    return pd.Series(codes, dtype=object).map(prices).astype('float64').fillna(default).to_numpy()
+
+
+def _ratio(num, den):
+    return np.divide(num * 100, den, out=np.zeros(len(num)), where=den > 0)
+
+
+def value_positions(positions, prices):
+    """보유 내역에 price/value/cost/profit/rate/weight 열을 붙여 반환.
+
+    weight는 같은 사용자의 주식 평가금액 합계 대비 비중(%).
+    시세가 없는 종목(None/누락)은 0원이 아니라 평균 단가로 평가 (손익 0).
+    """
+    qty = positions['quantity'].to_numpy(dtype='float64')
+    price = price_vector(positions['code'], prices, default=np.nan)
+    missing = np.isnan(price)
+    if missing.any():
+        price[missing] = positions['avg_price'].to_numpy(dtype='float64')[missing]
+    value = price * qty
+    cost = positions['avg_price'].to_numpy(dtype='float64') * qty
+    profit = value - cost
+    # 사용자별 합계는 groupby 대신 정수 코드 + bincount (작은 포트폴리오에서도 오버헤드가 적음)
+    groups, _ = pd.factorize(positions['user_id'])
+    user_value = np.bincount(groups, weights=value)[groups] if len(groups) else value
+    computed = pd.DataFrame({'price': price, 'value': value, 'cost': cost, 'profit': profit,
+                             'rate': _ratio(profit, cost), 'weight': _ratio(value, user_value)},
+                            index=positions.index)
+    return pd.concat([positions, computed], axis=1)
+
+
+def user_totals(valued, cash):
+    """사용자별 합계: cash, value, cost, profit, total_asset, rate.
+
+    cash: {user_id: 현금} - 보유 종목이 없는 사용자도 여기에 있으면 포함된다.
+    """
+    uids = list(cash)
+    slot = {uid: i for i, uid in enumerate(uids)}
+    groups, uniques = pd.factorize(valued['user_id'])
+    for uid in uniques:
+        if uid not in slot:
+            slot[uid] = len(uids)
+            uids.append(uid)
+    index = np.fromiter((slot[u] for u in uniques), dtype='int64', count=len(uniques))[groups]
+    sums = {name: np.bincount(index, weights=valued[name].to_numpy(), minlength=len(uids)).astype('float64')
+            for name in ('value', 'cost', 'profit')}
+    cash_arr = np.fromiter((cash.get(u, 0.0) for u in uids), dtype='float64', count=len(uids))
+    return pd.DataFrame({'cash': cash_arr, **sums, 'total_asset': cash_arr + sums['value'],
+                         'rate': _ratio(sums['profit'], sums['cost'])},
+                        index=pd.Index(uids, name='user_id'))
+
+
+def value_rows(rows, prices):
+    """사용자 한 명의 보유 내역 몇 줄을 파이썬 루프로 평가 -> (종목별 dict 목록, 주식 평가금액 합계).
+
+    rows: (code, name, quantity, avg_price) 반복자. 열과 규칙은 value_positions와 같음
+    (시세가 없으면 평균 단가로 평가). 대시보드처럼 요청마다 한 사용자만 평가할 때는
+    DataFrame 준비 비용이 계산보다 훨씬 커서 루프가 빠름 (bench/bench_valuation.py).
+    """
+    holdings, total = [], 0.0
+    for code, name, qty, avg in rows:
+        price = prices.get(code)
+        if price is None:
+            price = avg
+        value = price * qty
+        cost = avg * qty
+        profit = value - cost
+        holdings.append({'code': code, 'name': name, 'quantity': qty, 'avg_price': avg, 'price': price,
+                         'value': value, 'cost': cost, 'profit': profit,
+                         'rate': profit * 100 / cost if cost > 0 else 0.0})
+        total += value
+    for h in holdings:
+        h['weight'] = h['value'] * 100 / total if total > 0 else 0.0
+    return holdings, total
+
+
+# ==========================================
+# 포트폴리오 분석 (로컬 일봉 저장소 기준)
+# ==========================================
+def equity_curve(holdings, cash, load_history, days=90):
+    """현재 보유 수량을 기간 내내 들고 있었다고 보고 계산한 일별 평가액 곡선.
+
+    - holdings: {code: quantity}
+    - load_history(code, days) -> [(YYYY-MM-DD, close), ...]
+    거래일이 비는 종목은 직전 종가로 채운다.
+    """
+    closes = {}
+    for code in holdings:
+        rows = load_history(code, days)
+        if rows:
+            dates, values = zip(*rows)
+            closes[code] = pd.Series(values, index=pd.to_datetime(dates), dtype='float64')
+    if not closes:
+        # 보유 종목이 없어도 날짜 인덱스를 유지 (호출한 쪽에서 index.strftime 등을 그대로 쓰도록)
+        return pd.Series(dtype='float64', index=pd.DatetimeIndex([]), name='equity')
+    table = pd.DataFrame(closes).sort_index().ffill().fillna(0.0)
+    qty = np.array([holdings[c] for c in table.columns], dtype='float64')
+    return pd.Series(table.to_numpy() @ qty + cash, index=table.index, name='equity')
+
+
+def curve_stats(curve):
+    # 기간 수익률, 연환산 변동성, 최대 낙폭 (모두 %)
+    values = curve.to_numpy(dtype='float64')
+    if len(values) < 2 or values[0] <= 0:
+        return {'days': int(len(values)), 'return': 0.0, 'volatility': 0.0, 'max_drawdown': 0.0}
+    returns = np.diff(values) / values[:-1]
+    peak = np.maximum.accumulate(values)
+    drawdown = (values - peak) / peak
+    return {
+        'days': int(len(values)),
+        'return': float((values[-1] / values[0] - 1) * 100),
+        'volatility': float(returns.std(ddof=1) * np.sqrt(TRADING_DAYS) * 100) if len(returns) > 1 else 0.0,
+        'max_drawdown': float(drawdown.min() * 100),
+    }
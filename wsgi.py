@@ -0,0 +1,4 @@
+# 운영용 WSGI 진입점: gunicorn -c gunicorn.conf.py wsgi:app
+from app import app
+
+application = app